@@ -1,3 +1,25 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from main_g.testing import QueryBudgetMixin
 
 # Create your tests here.
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def test_account_views(self):
+        self.assertQueryBudget(0, reverse('home'))
+        self.assertQueryBudget(0, reverse('sign_up'))
+        self.assertQueryBudget(
+            12, reverse('sign_up'), 'post',
+            data={
+                'username': "ada", 'first_name': "Ada", 'last_name': "Obi", 'email': "ada@example.com",
+                'password1': "s3cret-pass!", 'password2': "s3cret-pass!",
+            },
+        )
+        self.assertQueryBudget(2, reverse('login'))  # signing up logged ada in
+        self.assertQueryBudget(6, reverse('login'), 'post', data={'username': "ada", 'password': "s3cret-pass!"})
+        self.assertQueryBudget(3, reverse('home'))
+        self.assertQueryBudget(4, reverse('logout'), 'post')
+        self.assertTrue(User.objects.filter(username="ada").exists())
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import InventoryList, SalesRecord
+from .models import DailySalesRollup, ExportJob, InventoryList, SaleSequence, SalesRecord
 # Register your models here.
 admin.site.register(InventoryList)
-admin.site.register(SalesRecord)
\ No newline at end of file
+admin.site.register(SalesRecord)
+admin.site.register(DailySalesRollup)
+admin.site.register(SaleSequence)
+admin.site.register(ExportJob)
\ No newline at end of file
@@ -0,0 +1,99 @@
+import pandas as pd
+from django.db import connection
+from django.db.models import CharField, F, FloatField
+from django.db.models.functions import Cast
+from django.utils.timezone import get_current_timezone_name
+
+from .models import InventoryList, SalesRecord
+from .reports import day_start, sale_date_range
+
+
+SALE_COLUMNS = ['sold_at', 'item_id', 'item', 'quantity', 'revenue']
+
+# Resample rules; weeks run Monday to Sunday and are labelled by their Monday, like the exports.
+RESAMPLE_RULES = {
+    'day': dict(rule='D'),
+    'week': dict(rule='W-MON', closed='left', label='left'),
+    'month': dict(rule='MS'),
+}
+
+
+def load_sales(user, start, end):
+    """
+    The user's sales in ``[start, end)`` as a DataFrame, loaded with a single query.
+
+    ``revenue`` is cast to a float in SQL so no Decimal objects are built per
+    row; that is precise enough for charts and rankings, but money that is
+    stored or invoiced should keep coming from ``line_total``. ``sale_date`` is
+    likewise fetched as text and parsed by pandas in one vectorized pass,
+    which is several times faster than building a datetime per row.
+    """
+    query = (
+        SalesRecord.objects.filter(user=user, **sale_date_range(start, end))
+        .annotate(
+            sold_at=Cast('sale_date', CharField()),
+            item_name=F('item__name'),
+            revenue=Cast('line_total', FloatField()),
+        )
+        .values_list('sold_at', 'item_id', 'item_name', 'quantity_sold', 'revenue')
+    )
+    # Run the compiled SQL on a plain cursor: every column is already text or a
+    # number, so Django's per-row converters would only add overhead.
+    sql, params = query.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        frame = pd.DataFrame.from_records(cursor.fetchall(), columns=SALE_COLUMNS)
+    sold_at = pd.to_datetime(frame['sold_at'], utc=True, format='ISO8601')
+    frame['sold_at'] = sold_at.dt.tz_convert(get_current_timezone_name())
+    return frame.astype({'item_id': 'int64', 'quantity': 'int64', 'revenue': 'float64'})
+
+
+class SalesAnalytics:
+    """Revenue series, rankings and sell-through for one user's sales in ``[start, end)``."""
+
+    def __init__(self, user, start, end):
+        self.user = user
+        self.start = start
+        self.end = end
+        self.sales = load_sales(user, start, end)
+
+    def daily_revenue(self):
+        """Revenue per day, with zero for days without sales."""
+        tz = get_current_timezone_name()
+        days = pd.date_range(day_start(self.start), day_start(self.end), freq='D', inclusive='left', tz=tz)
+        revenue = self.sales.set_index('sold_at')['revenue'].resample('D').sum()
+        return revenue.reindex(days, fill_value=0.0)
+
+    def revenue(self, granularity='day'):
+        """Revenue per ``'day'``, ``'week'`` or ``'month'``. Raises ValueError for anything else."""
+        try:
+            rule = RESAMPLE_RULES[granularity]
+        except KeyError:
+            raise ValueError(f"Unknown granularity: {granularity!r}")
+        return self.daily_revenue().resample(**rule).sum()
+
+    def moving_average(self, window=7):
+        """Trailing ``window``-day mean of daily revenue."""
+        return self.daily_revenue().rolling(window, min_periods=1).mean()
+
+    def top_items(self, n=10):
+        """The ``n`` best-selling items by revenue, with the units sold."""
+        by_item = self.sales.groupby(['item_id', 'item'], sort=False)[['quantity', 'revenue']].sum()
+        return by_item.nlargest(n, 'revenue').reset_index()
+
+    def sell_through(self):
+        """
+        Share of the available units sold in the range, per inventory item.
+
+        Stock sold is already deducted from ``quantity``, so the units available
+        at the start are what was sold plus what is still on hand.
+        """
+        stock = pd.DataFrame.from_records(
+            InventoryList.objects.filter(user=self.user).values_list('id', 'name', 'quantity'),
+            columns=['item_id', 'item', 'on_hand'],
+        )
+        sold = self.sales.groupby('item_id')['quantity'].sum().rename('sold')
+        frame = stock.join(sold, on='item_id').fillna({'sold': 0}).astype({'sold': 'int64'})
+        available = frame['sold'] + frame['on_hand']
+        frame['sell_through'] = (frame['sold'] / available.where(available > 0)).fillna(0.0)
+        return frame.sort_values('sell_through', ascending=False, ignore_index=True)
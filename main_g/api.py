@@ -0,0 +1,169 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import BadRequest
+from django.db.models import Count, Max, Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from django.utils.timezone import is_naive, localdate, make_aware, now
+from django.views.decorators.http import require_GET
+
+from .caching import cached_sales_totals
+from .models import InventoryList, SalesRecord
+from .pagination import decode_position, encode_position
+
+
+# API field name -> the lookup it is read from; ``?fields=`` picks from these.
+INVENTORY_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'price': 'price',
+    'quantity': 'quantity',
+    'reorder_level': 'reorder_level',
+    'updated_at': 'updated_at',
+}
+SALE_FIELDS = {
+    'id': 'id',
+    'sale_id': 'sale_id',
+    'item_id': 'item_id',
+    'item': 'item__name',
+    'quantity_sold': 'quantity_sold',
+    'unit_price': 'unit_price',
+    'line_total': 'line_total',
+    'sale_date': 'sale_date',
+    'updated_at': 'updated_at',
+}
+PAGE_SIZE = 500
+
+
+def selected_fields(request, available):
+    """``{name: lookup}`` for the fields named in ``?fields=a,b`` (all of them when absent)."""
+    names = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}.")
+    return {name: available[name] for name in names} if names else dict(available)
+
+
+def updated_since(request):
+    """The ``?updated_since=`` ISO 8601 date-time, or None; naive values are local time."""
+    raw = request.GET.get('updated_since')
+    if raw is None:
+        return None
+    try:
+        since = parse_datetime(raw)
+    except ValueError:
+        since = None
+    if since is None:
+        raise BadRequest("updated_since must be an ISO 8601 date-time.")
+    return make_aware(since) if is_naive(since) else since
+
+
+def make_etag(*parts):
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def conditional_json(request, etag, build, last_modified=None):
+    """
+    A JSON response built by ``build()``, or a 304 if the client already has
+    the version identified by ``etag`` (and ``last_modified``, when given).
+    """
+    last_modified = last_modified and last_modified.timestamp()
+    response = get_conditional_response(request, etag=f'"{etag}"', last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(build())
+    response['ETag'] = f'"{etag}"'
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def sync_list(request, queryset, available):
+    """
+    One page of ``queryset``, oldest change first, as ``{results, next_cursor, updated_until}``.
+
+    ``?updated_since=`` limits the page to rows changed after that time; pass
+    the previous sync's ``updated_until`` to fetch only what changed since.
+    That is the newest change, but never later than ``API_SYNC_LAG`` seconds
+    ago, so rows from a transaction still open are picked up by the next sync;
+    recent rows may come twice and should be upserted by id. Deleted rows are
+    not reported, so clients should do a full fetch now and then. The ETag
+    comes from the count and newest change of the matching rows (one indexed
+    aggregate), so an unchanged list costs no row fetch at all.
+    """
+    fields = selected_fields(request, available)
+    rows = queryset.filter(user=request.user)
+    since = updated_since(request)
+    if since is not None:
+        rows = rows.filter(updated_at__gt=since)
+    stats = rows.aggregate(count=Count('id'), last=Max('updated_at'))
+    etag = make_etag(request.user.pk, stats['count'], stats['last'], sorted(request.GET.lists()))
+    until = stats['last'] and min(stats['last'], now() - timedelta(seconds=settings.API_SYNC_LAG))
+
+    def build():
+        page = rows.order_by('updated_at', 'id')
+        if cursor := request.GET.get('cursor'):
+            when, pk = decode_position(cursor)
+            page = page.filter(Q(updated_at__gt=when) | Q(updated_at=when, id__gt=pk))
+        lookups = dict.fromkeys([*fields.values(), 'id', 'updated_at'])
+        values = list(page.values(*lookups)[:PAGE_SIZE + 1])
+        last = values[PAGE_SIZE - 1] if len(values) > PAGE_SIZE else None
+        return {
+            'results': [{name: row[lookup] for name, lookup in fields.items()} for row in values[:PAGE_SIZE]],
+            'next_cursor': last and encode_position(last['updated_at'], last['id']),
+            # Full precision: the JSON encoder would round to milliseconds and re-send rows.
+            'updated_until': until and until.isoformat(),
+        }
+
+    return conditional_json(request, etag, build)
+
+
+def detail(request, queryset, available, pk):
+    """One row of ``queryset`` with the ``?fields=`` projection, versioned by its ``updated_at``."""
+    fields = selected_fields(request, available)
+    row = get_object_or_404(
+        queryset.filter(user=request.user).values(*dict.fromkeys([*fields.values(), 'updated_at'])), pk=pk
+    )
+    etag = make_etag(pk, row['updated_at'], sorted(fields))
+    return conditional_json(
+        request, etag, lambda: {name: row[lookup] for name, lookup in fields.items()}, row['updated_at']
+    )
+
+
+@login_required
+@require_GET
+def inventory_list(request):
+    return sync_list(request, InventoryList.objects.all(), INVENTORY_FIELDS)
+
+
+@login_required
+@require_GET
+def inventory_item(request, pk):
+    return detail(request, InventoryList.objects.all(), INVENTORY_FIELDS, pk)
+
+
+@login_required
+@require_GET
+def sales_list(request):
+    return sync_list(request, SalesRecord.objects.all(), SALE_FIELDS)
+
+
+@login_required
+@require_GET
+def sale(request, pk):
+    return detail(request, SalesRecord.objects.all(), SALE_FIELDS, pk)
+
+
+@login_required
+@require_GET
+def totals(request):
+    """Today's, this week's and this month's revenue, from the same cache as the sales list."""
+    today = localdate()
+    data = {'date': today, **cached_sales_totals(request.user, today)}
+    return conditional_json(request, make_etag(request.user.pk, *data.values()), lambda: data)
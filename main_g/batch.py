@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, localdate, make_aware, now
+
+from .caching import invalidate_sales_totals
+from .models import DailySalesRollup, InventoryList, SaleSequence, SalesRecord
+
+
+MAX_BATCH_SIZE = 5000
+# Largest values the columns hold (BigAutoField ids, PositiveIntegerField quantities) on every backend;
+# anything bigger overflows the database driver instead of failing validation.
+MAX_ITEM_ID = 2 ** 63 - 1
+MAX_QUANTITY = 2 ** 31 - 1
+
+
+class BatchError(Exception):
+    """A batch was rejected; ``errors`` is a list of ``{"row": index, "error": message}``."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid sale(s)")
+        self.errors = errors
+
+
+def parse_sales(text, content_type="application/json"):
+    """
+    Turn an uploaded batch into a list of row dicts.
+
+    JSON may be a list of sales or ``{"sales": [...]}``; CSV needs a header
+    row with ``item`` and ``quantity_sold`` columns. Either may give each sale
+    a ``sold_at`` ISO 8601 time (local time if it has no offset).
+    """
+    if "csv" in content_type:
+        return list(csv.DictReader(io.StringIO(text)))
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise BatchError([{"row": None, "error": "Body is not valid JSON."}])
+    if isinstance(data, dict):
+        data = data.get("sales")
+    if not isinstance(data, list):
+        raise BatchError([{"row": None, "error": 'Expected a list of sales or {"sales": [...]}.'}])
+    return data
+
+
+def _integer(value):
+    """``value`` as an int, refusing anything with a fractional part rather than truncating it."""
+    if isinstance(value, str):
+        return int(value.strip())  # int("2.9") raises
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(value)
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+
+def _sold_at(value, recorded_at):
+    """The sale's ``sold_at`` time, ``recorded_at`` when it has none; None if it is invalid or in the future."""
+    if value in (None, ""):
+        return recorded_at
+    try:
+        sold_at = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+    if sold_at is not None and is_naive(sold_at):
+        sold_at = make_aware(sold_at)
+    return sold_at if sold_at is not None and sold_at <= recorded_at else None
+
+
+def _clean(rows, recorded_at):
+    cleaned, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            item_id = _integer(row["item"])
+            quantity = _integer(row["quantity_sold"])
+        except (KeyError, TypeError, ValueError):
+            errors.append({"row": index, "error": "Each sale needs an integer item and quantity_sold."})
+            continue
+        if quantity < 1:
+            errors.append({"row": index, "error": "quantity_sold must be at least 1."})
+            continue
+        if not 0 < item_id <= MAX_ITEM_ID or quantity > MAX_QUANTITY:
+            errors.append({"row": index, "error": "item or quantity_sold is out of range."})
+            continue
+        sold_at = _sold_at(row.get("sold_at"), recorded_at)
+        if sold_at is None:
+            errors.append({"row": index, "error": "sold_at must be an ISO 8601 time that is not in the future."})
+            continue
+        cleaned.append((item_id, quantity, sold_at))
+    return cleaned, errors
+
+
+def record_sales(user, rows):
+    """
+    Record a whole batch of sales for ``user`` or none of them.
+
+    Stock for every item is locked and checked in one query, sale_ids are
+    reserved as one block per day sold, the sales go in with ``bulk_create``
+    and stock and each day's rollup are adjusted with one UPDATE each. Sales
+    keep their ``sold_at`` time, so an offline till's backlog lands on the
+    days it was sold. The per-sale post_save handler is not involved. Raises
+    BatchError listing every offending row.
+    """
+    if len(rows) > MAX_BATCH_SIZE:
+        raise BatchError([{"row": None, "error": f"At most {MAX_BATCH_SIZE} sales per batch."}])
+    cleaned, errors = _clean(rows, now())
+    if errors:
+        raise BatchError(errors)
+    if not cleaned:
+        return []
+
+    wanted = Counter()
+    for item_id, quantity, _ in cleaned:
+        wanted[item_id] += quantity
+
+    with transaction.atomic():
+        items = InventoryList.objects.select_for_update().filter(user=user).in_bulk(list(wanted))
+        for index, (item_id, _, _) in enumerate(cleaned):
+            if item_id not in items:
+                errors.append({"row": index, "error": f"Unknown item {item_id}."})
+            elif items[item_id].quantity < wanted[item_id]:
+                errors.append({"row": index, "error": f"Not enough stock of {items[item_id].name}."})
+        if errors:
+            raise BatchError(errors)
+
+        window = settings.STOCK_VELOCITY_DAYS
+        InventoryList.objects.filter(pk__in=list(wanted)).update(
+            quantity=Case(
+                *(When(pk=item_id, then=F('quantity') - quantity) for item_id, quantity in wanted.items())
+            ),
+            velocity=Case(
+                *(When(pk=item_id, then=F('velocity') + quantity / window) for item_id, quantity in wanted.items())
+            ),
+            updated_at=now(),
+        )
+
+        by_day = defaultdict(list)
+        for item_id, quantity, sold_at in cleaned:
+            # The local day, as for the rollups, not the day in the offset the client sent.
+            by_day[localdate(sold_at)].append((item_id, quantity, sold_at))
+        sales = []
+        for day, day_sales in by_day.items():
+            first = SaleSequence.allocate(day, count=len(day_sales))
+            for number, (item_id, quantity, sold_at) in enumerate(day_sales, first):
+                price = items[item_id].price
+                sales.append(SalesRecord(
+                    user=user,
+                    item_id=item_id,
+                    quantity_sold=quantity,
+                    sale_date=sold_at,
+                    sale_id=SaleSequence.format(day, number),
+                    unit_price=price,
+                    line_total=price * quantity,
+                ))
+        SalesRecord.objects.bulk_create(sales)
+
+        rollups = defaultdict(lambda: [0, 0, 0])
+        for sale in sales:
+            rollup = rollups[localdate(sale.sale_date)]
+            rollup[0] += sale.quantity_sold
+            rollup[1] += sale.line_total
+            rollup[2] += 1
+        for day, (quantity, revenue, count) in rollups.items():
+            DailySalesRollup.add(user.pk, day, quantity, revenue, count)
+        invalidate_sales_totals(user.pk)
+    return sales
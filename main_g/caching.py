@@ -0,0 +1,103 @@
+import hashlib
+import tempfile
+from collections import Counter
+from functools import partial
+from io import BytesIO
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from .reports import asales_totals, format_watermark, sales_range_stats, sales_totals
+
+
+# Hits and misses seen by this process; each worker keeps its own.
+stats = Counter(hits=0, misses=0, export_hits=0, export_misses=0)
+
+
+def totals_key(user_id, today):
+    # Keyed by date so the cached week/month windows roll over at midnight on their own.
+    return f"sales-totals:{user_id}:{today.isoformat()}"
+
+
+def cached_sales_totals(user, today):
+    """``reports.sales_totals`` served from the cache, computing and storing it on a miss."""
+    key = totals_key(user.pk, today)
+    totals = cache.get(key)
+    if totals is not None:
+        stats['hits'] += 1
+        return totals
+    stats['misses'] += 1
+    totals = sales_totals(user, today)
+    cache.set(key, totals, settings.SALES_TOTALS_CACHE_TIMEOUT)
+    return totals
+
+
+async def acached_sales_totals(user, today):
+    """``cached_sales_totals`` for async views."""
+    key = totals_key(user.pk, today)
+    totals = await cache.aget(key)
+    if totals is not None:
+        stats['hits'] += 1
+        return totals
+    stats['misses'] += 1
+    totals = await asales_totals(user, today)
+    await cache.aset(key, totals, settings.SALES_TOTALS_CACHE_TIMEOUT)
+    return totals
+
+
+def invalidate_sales_totals(user_id):
+    """
+    Drop the user's cached totals once the current transaction commits.
+
+    Deleting after commit stops a concurrent request from re-caching the
+    totals as they were before the change.
+    """
+    transaction.on_commit(partial(cache.delete, totals_key(user_id, localdate())))
+
+
+class ExportVersion(NamedTuple):
+    key: str
+    etag: str
+    last_modified: object  # aware datetime, or None for an empty range
+
+
+def export_version(user, layout, format_name, start, end):
+    """
+    Identify the ``layout`` export of ``[start, end)`` as it stands now, in one indexed query.
+
+    The cache key and ETag are derived from the sales watermark, so they change
+    as soon as a sale in the range is added, removed or edited, or an item it
+    names is renamed, and never need invalidating. ``layout`` must capture
+    everything else the file depends on. ``last_modified`` is the newest change
+    to a sale in the range; deleting that sale moves it backwards, which is why
+    clients should prefer the ETag.
+    """
+    stats = sales_range_stats(user, start, end)
+    key = f"sales-export:{user.pk}:{layout}:{format_name}:{start}:{end}:{format_watermark(stats)}"
+    return ExportVersion(key, hashlib.sha256(key.encode()).hexdigest()[:32], stats['modified'])
+
+
+def cached_export(key, write):
+    """
+    Open file with the export stored under ``key``, rendering it with ``write(fileobj)`` on a miss.
+
+    Exports live in the ``exports`` cache, apart from the totals. Renders bigger
+    than ``EXPORT_CACHE_MAX_BYTES`` are served from a temporary file without
+    being cached.
+    """
+    export_cache = caches['exports']
+    content = export_cache.get(key)
+    if content is not None:
+        stats['export_hits'] += 1
+        return BytesIO(content)
+    stats['export_misses'] += 1
+    tmp = tempfile.TemporaryFile()
+    write(tmp)
+    if tmp.tell() <= settings.EXPORT_CACHE_MAX_BYTES:
+        tmp.seek(0)
+        export_cache.set(key, tmp.read(), settings.EXPORT_CACHE_TIMEOUT)
+    tmp.seek(0)
+    return tmp
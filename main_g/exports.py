@@ -0,0 +1,152 @@
+import csv
+import json
+import zlib
+from importlib import import_module
+from io import StringIO
+from itertools import chain
+from typing import Callable, NamedTuple
+
+from asgiref.sync import sync_to_async
+
+
+class ExportFormat(NamedTuple):
+    extension: str
+    content_type: str
+    # write(out, report, period, today) renders the report into a binary file.
+    write: Callable
+    # write_range(out, report, granularity) renders a date-range export.
+    write_range: Callable
+
+
+def _deferred(module, name):
+    """
+    ``module.name``, imported on first call.
+
+    openpyxl and ReportLab are a large share of the app's import time, so the
+    writers load when an export is first rendered rather than at startup.
+    """
+    def call(*args, **kwargs):
+        return getattr(import_module(module, __package__), name)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = name
+    return call
+
+
+FORMATS = {
+    'excel': ExportFormat(
+        'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        _deferred('.xlsx', 'write_workbook'), _deferred('.xlsx', 'write_range_workbook'),
+    ),
+    'pdf': ExportFormat(
+        'pdf', 'application/pdf', _deferred('.pdf', 'write_pdf'), _deferred('.pdf', 'write_range_pdf'),
+    ),
+}
+DEFAULT_FORMAT = 'excel'
+
+# Raw row dumps for downstream jobs, streamed straight from the sales cursor.
+ROW_FIELDS = ['sale_id', 'item', 'quantity_sold', 'unit_price', 'line_total', 'sale_date']
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class StreamFormat(NamedTuple):
+    extension: str
+    content_type: str
+    header: str
+    # line(row) renders one SaleRow, including its line break.
+    line: Callable
+
+
+def _csv_line(values):
+    buffer = StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def csv_line(row):
+    return _csv_line([row.sale_id, row.item, row.quantity, row.price, row.total, row.sold_at.isoformat()])
+
+
+def ndjson_line(row):
+    values = [row.sale_id, row.item, row.quantity, str(row.price), str(row.total), row.sold_at.isoformat()]
+    return json.dumps(dict(zip(ROW_FIELDS, values))) + "\n"
+
+
+STREAM_FORMATS = {
+    'csv': StreamFormat('csv', 'text/csv', _csv_line(ROW_FIELDS), csv_line),
+    'ndjson': StreamFormat('ndjson', 'application/x-ndjson', '', ndjson_line),
+}
+
+
+def get_format(name):
+    """The export format called ``name``, falling back to Excel like the export links always have."""
+    return FORMATS.get(name, FORMATS[DEFAULT_FORMAT])
+
+
+def known_format(name):
+    """``name`` if it is a known format, otherwise the default."""
+    return name if name in FORMATS else DEFAULT_FORMAT
+
+
+def export_filename(export_format, period, today):
+    return f"sales_{period}_{today}.{export_format.extension}"
+
+
+def range_filename(export_format, start, end, granularity):
+    return f"sales_{start}_{end}_by_{granularity}.{export_format.extension}"
+
+
+
+class _Encoder:
+    """Gathers lines into chunks of about ``chunk_size`` characters, gzipping them if asked."""
+
+    def __init__(self, compress, chunk_size):
+        self.compressor = zlib.compressobj(wbits=31) if compress else None  # 31 selects the gzip container
+        self.chunk_size = chunk_size
+        self.pending = []
+        self.size = 0
+
+    def add(self, line):
+        """Buffer ``line``; returns the next chunk of bytes once enough has built up, else b''."""
+        self.pending.append(line)
+        self.size += len(line)
+        return self._flush() if self.size >= self.chunk_size else b''
+
+    def finish(self):
+        data = self._flush()
+        return data + self.compressor.flush() if self.compressor else data
+
+    def _flush(self):
+        data = "".join(self.pending).encode()
+        self.pending, self.size = [], 0
+        return self.compressor.compress(data) if self.compressor else data
+
+
+def stream_rows(stream_format, rows, compress=False, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield ``rows`` rendered by ``stream_format`` as UTF-8 bytes, optionally gzipped.
+
+    Lines are gathered into chunks of about ``chunk_size`` bytes so the
+    response is not written one tiny row at a time; memory stays constant.
+    """
+    encoder = _Encoder(compress, chunk_size)
+    for line in chain([stream_format.header], map(stream_format.line, rows)):
+        if chunk := encoder.add(line):
+            yield chunk
+    yield encoder.finish()
+
+
+async def astream_rows(stream_format, rows, compress=False, chunk_size=STREAM_CHUNK_SIZE):
+    """``stream_rows`` over an async iterator of rows, for async views."""
+    encoder = _Encoder(compress, chunk_size)
+    if chunk := encoder.add(stream_format.header):
+        yield chunk
+    async for row in rows:
+        if chunk := encoder.add(stream_format.line(row)):
+            yield chunk
+    yield encoder.finish()
+
+
+async def aread_file(fileobj, chunk_size):
+    """Yield ``fileobj`` in ``chunk_size`` blocks, reading off the event loop, for async views."""
+    read = sync_to_async(fileobj.read)
+    while chunk := await read(chunk_size):
+        yield chunk
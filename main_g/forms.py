@@ -1,5 +1,10 @@
+from datetime import date
+
 from django import forms
+from django.core.validators import MaxValueValidator, MinValueValidator
+from .exports import DEFAULT_FORMAT, FORMATS, STREAM_FORMATS
 from .models import SalesRecord, InventoryList
+from .reports import GRANULARITIES
 
 
 class SalesRecordForm(forms.ModelForm):
@@ -17,6 +22,49 @@ class SalesRecordForm(forms.ModelForm):
         item = cleaned_data.get('item')
         quantity_sold = cleaned_data.get('quantity_sold')
 
+        # Early check only; the stock UPDATE in the post_save handler is authoritative.
         if item and quantity_sold and item.quantity < quantity_sold:
             raise forms.ValidationError("Not enough stock available.")
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class ExportRangeForm(forms.Form):
+    """
+    Query parameters of a date-range export; ``end`` is inclusive.
+
+    Rendered formats are limited to ``MAX_DAYS``; the streamed row formats
+    run in constant memory and can cover the whole history. Dates are kept
+    well inside ``date.min``/``date.max`` so the exclusive end and the
+    week and month sections around the range can still be computed.
+    """
+
+    MAX_DAYS = 5 * 366
+    FIRST_DATE = date(1900, 1, 1)
+    LAST_DATE = date(9998, 12, 31)
+    date_validators = [MinValueValidator(FIRST_DATE), MaxValueValidator(LAST_DATE)]
+
+    start = forms.DateField(input_formats=['%Y-%m-%d'], validators=date_validators)
+    end = forms.DateField(input_formats=['%Y-%m-%d'], validators=date_validators)
+    granularity = forms.ChoiceField(choices=[(g, g) for g in GRANULARITIES], required=False)
+    format = forms.ChoiceField(choices=[(f, f) for f in [*FORMATS, *STREAM_FORMATS]], required=False)
+
+    def clean_granularity(self):
+        return self.cleaned_data['granularity'] or 'day'
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or DEFAULT_FORMAT
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end:
+            if start > end:
+                raise forms.ValidationError("start must not be after end.")
+            if cleaned_data.get('format') in FORMATS and (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Exports are limited to {self.MAX_DAYS} days.")
+        return cleaned_data
+
+
+class InventoryImportForm(forms.Form):
+    file = forms.FileField(help_text="An .xlsx or .csv file with name, price and quantity columns.")
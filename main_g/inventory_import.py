@@ -0,0 +1,149 @@
+import csv
+import io
+import zipfile
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import PurePath
+from typing import NamedTuple
+
+from django.db import connection, transaction
+
+from .models import InventoryList
+
+
+IMPORT_BATCH_SIZE = 1000
+COLUMNS = ('name', 'price', 'quantity')
+NAME_LENGTH = InventoryList._meta.get_field('name').max_length
+MAX_PRICE = Decimal(10) ** 8  # price is DecimalField(max_digits=10, decimal_places=2)
+
+
+class InventoryFileError(Exception):
+    """The file could not be read at all (wrong type or encoding, missing columns)."""
+
+
+class ImportResult(NamedTuple):
+    created: int
+    updated: int
+    # ``{"row": n, "error": message}`` with ``n`` the line number in the file (the header is line 1).
+    errors: list
+
+
+def _xlsx_rows(fileobj):
+    from openpyxl import load_workbook  # only imported when a workbook is uploaded
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        # KeyError: a zip archive without the workbook parts.
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError):
+        raise InventoryFileError("File is not a readable .xlsx workbook.")
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()  # a read-only workbook keeps the file open until closed
+
+
+def _csv_rows(fileobj):
+    # The text is decoded as it is read, so a bad byte can turn up on any line.
+    try:
+        yield from csv.reader(io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+    except UnicodeDecodeError:
+        raise InventoryFileError("File must be UTF-8 encoded.")
+
+
+def read_rows(fileobj, filename):
+    """
+    Yield ``(line_number, {"name", "price", "quantity"})`` for each data row of
+    an uploaded .xlsx or .csv file, reading it as a stream.
+
+    The first row must be a header naming the three columns (in any order,
+    case-insensitively); other columns are ignored. Raises InventoryFileError
+    for unsupported or unreadable files, a CSV that is not UTF-8 or a missing
+    column.
+    """
+    suffix = PurePath(filename).suffix.lower()
+    if suffix == '.xlsx':
+        rows = _xlsx_rows(fileobj)
+    elif suffix == '.csv':
+        rows = _csv_rows(fileobj)
+    else:
+        raise InventoryFileError("Upload an .xlsx or .csv file.")
+
+    header = [str(cell or '').strip().lower() for cell in next(rows, [])]
+    missing = [column for column in COLUMNS if column not in header]
+    if missing:
+        raise InventoryFileError(f"Missing column(s): {', '.join(missing)}.")
+    positions = [header.index(column) for column in COLUMNS]
+
+    for line, row in enumerate(rows, 2):
+        if not any(cell not in (None, '') for cell in row):
+            continue  # blank line
+        yield line, {column: row[i] if i < len(row) else None for column, i in zip(COLUMNS, positions)}
+
+
+def _clean(row):
+    """Return ``(name, price, quantity)``, or raise ValueError with a message for the report."""
+    name = str(row['name'] or '').strip()
+    if not name:
+        raise ValueError("name is required.")
+    if len(name) > NAME_LENGTH:
+        raise ValueError(f"name is longer than {NAME_LENGTH} characters.")
+    try:
+        price = Decimal(str(row['price']).strip())
+    except InvalidOperation:
+        raise ValueError("price must be a number.")
+    if not price.is_finite() or price < 0 or price >= MAX_PRICE:
+        raise ValueError("price must be between 0 and 99999999.99.")
+    try:
+        quantity = Decimal(str(row['quantity']).strip())
+    except InvalidOperation:
+        raise ValueError("quantity must be a whole number.")
+    if not quantity.is_finite() or quantity != quantity.to_integral_value() or quantity < 0:
+        raise ValueError("quantity must be a whole number of at least 0.")
+    return name, price.quantize(Decimal('0.01')), int(quantity)
+
+
+def _upsert(user, batch):
+    """Write one batch of ``{name: (price, quantity)}``; returns ``(created, updated)``."""
+    names = list(batch)
+    existing = InventoryList.objects.filter(user=user, name__in=names).count()
+    InventoryList.objects.bulk_create(
+        [
+            InventoryList(user=user, name=name, price=price, quantity=quantity)
+            for name, (price, quantity) in batch.items()
+        ],
+        update_conflicts=True,
+        # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target.
+        unique_fields=['user', 'name'] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=['price', 'quantity', 'updated_at'],
+    )
+    return len(names) - existing, existing
+
+
+def import_inventory(user, fileobj, filename, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Create or update ``user``'s inventory from an uploaded file, matching items by name.
+
+    Matched items get the file's price and quantity. Valid rows are written
+    ``batch_size`` at a time (a count and one INSERT ... ON CONFLICT DO UPDATE
+    per batch) inside a single transaction, so memory stays bounded; invalid
+    rows are skipped and listed in the result. If a name appears twice in the
+    file, the later row wins.
+    """
+    created = updated = 0
+    errors = []
+    rows = read_rows(fileobj, filename)
+    with transaction.atomic():
+        while chunk := list(islice(rows, batch_size)):
+            batch = {}
+            for line, row in chunk:
+                try:
+                    name, price, quantity = _clean(row)
+                except ValueError as e:
+                    errors.append({"row": line, "error": str(e)})
+                    continue
+                batch[name] = (price, quantity)
+            new, changed = _upsert(user, batch)
+            created += new
+            updated += changed
+    return ImportResult(created, updated, errors)
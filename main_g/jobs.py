@@ -0,0 +1,109 @@
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from .exports import FORMATS, export_filename, get_format
+from .models import ExportJob
+from .reports import SalesReport, period_bounds, sales_watermark
+
+
+logger = logging.getLogger(__name__)
+
+
+def stale_jobs():
+    """Running jobs whose worker has had ``EXPORT_JOB_TIMEOUT`` seconds and is presumed dead."""
+    cutoff = now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    return ExportJob.objects.filter(
+        Q(started_at__lt=cutoff) | Q(started_at__isnull=True), status=ExportJob.RUNNING
+    )
+
+
+def _reusable_job(key):
+    """The newest job for ``key`` that has neither failed nor stalled, or None."""
+    return (
+        ExportJob.objects.filter(**key)
+        .exclude(status=ExportJob.FAILED)
+        .exclude(pk__in=stale_jobs().values('pk'))
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def request_export(user, period, anchor, format_name):
+    """
+    Queue an export, or return the job that already covers it.
+
+    A job is reused while the user's sales in the period are unchanged (same
+    watermark) and it has neither failed nor stalled. Raises ValueError for
+    unknown periods and for formats the worker cannot render (the streamed
+    row formats).
+    """
+    if format_name not in FORMATS:
+        raise ValueError(f"Unknown export format {format_name!r}.")
+    start, end = period_bounds(period, anchor)
+    key = dict(user=user, period=period, anchor=anchor, format=format_name, watermark=sales_watermark(user, start, end))
+    if job := _reusable_job(key):
+        return job
+    try:
+        with transaction.atomic():
+            return ExportJob.objects.create(**key)
+    except IntegrityError:
+        # A concurrent request queued the same export first (one pending job per key).
+        return _reusable_job(key)
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest pending job to running and return it, or None if the queue is empty.
+
+    Stalled jobs are marked failed first rather than retried, so an export
+    that kills its worker cannot take down every worker in turn.
+    """
+    stale_jobs().update(status=ExportJob.FAILED, error="The export worker stopped before finishing.", finished_at=now())
+    while True:
+        job = ExportJob.objects.filter(status=ExportJob.PENDING).order_by('created_at').first()
+        if job is None:
+            return None
+        # Another worker may get there first; the conditional UPDATE decides.
+        started_at = now()
+        claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.PENDING).update(
+            status=ExportJob.RUNNING, started_at=started_at
+        )
+        if claimed:
+            job.status, job.started_at = ExportJob.RUNNING, started_at
+            return job
+
+
+def run_job(job):
+    """Render ``job`` into storage and mark it done (or failed)."""
+    export_format = get_format(job.format)
+    try:
+        report = SalesReport(job.user, *period_bounds(job.period, job.anchor))
+        with tempfile.TemporaryFile() as tmp:
+            export_format.write(tmp, report, job.period, job.anchor)
+            tmp.seek(0)
+            job.file.save(export_filename(export_format, job.period, job.anchor), File(tmp), save=False)
+        job.status = ExportJob.DONE
+    except Exception as e:
+        logger.exception("Export job %s failed", job.pk)
+        job.status = ExportJob.FAILED
+        job.error = str(e)
+    job.finished_at = now()
+    job.save()
+
+    if job.status == ExportJob.DONE:
+        # Earlier renders of the same export are out of date now.
+        superseded = ExportJob.objects.filter(
+            user=job.user, period=job.period, anchor=job.anchor, format=job.format,
+            status=ExportJob.DONE, created_at__lt=job.created_at,
+        )
+        for old in superseded:
+            old.file.delete(save=False)
+        superseded.delete()
+    return job
@@ -0,0 +1,104 @@
+import random
+import time
+from datetime import datetime, time as day_time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.timezone import localdate, make_aware
+
+from main_g.models import InventoryList, SalesRecord
+from main_g.reports import sale_date_range
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic sales inside a transaction, time the hot sales queries with "
+        "and without the composite indexes, then roll everything back. "
+        "Holds table locks for the whole run, so do not point it at a live database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--items", type=int, default=50, help="Inventory items per user.")
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        # SQLite can only alter tables inside a transaction with FK checks switched off.
+        constraints_disabled = connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                user = self.seed(options)
+                indexed = self.time_queries(user, options["repeat"])
+                # Inventory lookups by name go through the (user, name) unique constraint,
+                # which stays in place, so only the sales indexes are compared.
+                with connection.schema_editor() as editor:
+                    for index in SalesRecord._meta.indexes:
+                        editor.remove_index(SalesRecord, index)
+                unindexed = self.time_queries(user, options["repeat"])
+                self.stdout.write(f"{'query':<28}{'indexed ms':>12}{'unindexed ms':>14}")
+                for name in indexed:
+                    self.stdout.write(f"{name:<28}{indexed[name]:>12.2f}{unindexed[name]:>14.2f}")
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if constraints_disabled:
+                connection.enable_constraint_checking()
+
+    def seed(self, options):
+        self.stdout.write(f"Seeding {options['rows']} sales for {options['users']} users...")
+        rng = random.Random(0)
+        users = User.objects.bulk_create(
+            User(username=f"bench-{i}") for i in range(options["users"])
+        )
+        items = InventoryList.objects.bulk_create(
+            InventoryList(user=user, name=f"Item {n:05d}", price=rng.randint(100, 5000) / 100, quantity=10_000)
+            for user in users for n in range(options["items"])
+        )
+        # Rows are spread evenly over the period, each at its own time of day.
+        start = make_aware(datetime.combine(localdate() - timedelta(days=options["days"] - 1), day_time.min))
+        batch = []
+        for n in range(options["rows"]):
+            item = rng.choice(items)
+            quantity = rng.randint(1, 5)
+            day = n * options["days"] // options["rows"]
+            batch.append(SalesRecord(
+                user_id=item.user_id, item=item, quantity_sold=quantity,
+                sale_date=start + timedelta(days=day, seconds=rng.randrange(86400)),
+                sale_id=f"B{n:09d}", unit_price=item.price, line_total=item.price * quantity,
+            ))
+            if len(batch) == options["batch_size"]:
+                SalesRecord.objects.bulk_create(batch)
+                batch = []
+        SalesRecord.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return users[0]
+
+    def time_queries(self, user, repeat):
+        today = localdate()
+        queries = {
+            "today, __date cast": lambda: SalesRecord.objects.filter(user=user, sale_date__date=today).count(),
+            "today, half-open range": lambda: SalesRecord.objects.filter(
+                user=user, **sale_date_range(today, today + timedelta(days=1))).count(),
+            "month report rows": lambda: list(SalesRecord.objects.filter(
+                user=user, **sale_date_range(today.replace(day=1), today + timedelta(days=1))
+            ).order_by('sale_date', 'id').values_list('id', flat=True)),
+            "latest 25": lambda: list(SalesRecord.objects.filter(user=user).order_by('-sale_date')[:25]),
+        }
+        results = {}
+        for name, query in queries.items():
+            query()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                query()
+            results[name] = (time.perf_counter() - started) * 1000 / repeat
+        return results
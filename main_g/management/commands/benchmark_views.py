@@ -0,0 +1,116 @@
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main_g.exports import FORMATS, STREAM_FORMATS
+from main_g.models import InventoryList
+
+
+PERIODS = ['day', 'week', 'month']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the sales list, recording a sale and every export period/format for one "
+        "user (seed one with seed_sales), reporting p50/p95 latency, queries and peak "
+        "memory. Runs against whatever DATABASE_URL points at (compare SQLite with a local "
+        "PostgreSQL by running it twice) inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default="bench-0")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--cached", action="store_true",
+            help="Keep the export cache between runs instead of clearing it before each request.",
+        )
+        parser.add_argument("--only", help="Only run scenarios whose name contains this text.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}; run seed_sales first.")
+        item = InventoryList.objects.filter(user=user).order_by('-quantity').first()
+        if item is None:
+            raise CommandError(f"{user.username} has no inventory to sell.")
+
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(user)
+        self.stdout.write(
+            f"{connection.vendor}, {options['repeat']} runs each\n"
+            f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak MB':>9}{'KB':>9}"
+        )
+        try:
+            with transaction.atomic():
+                for name, request in self.scenarios(item):
+                    if options["only"] and options["only"] not in name:
+                        continue
+                    self.report(name, self.measure(client, request, options))
+                raise Rollback
+        except Rollback:
+            pass
+
+    def scenarios(self, item):
+        yield "sales list", ('get', reverse('sales_list'), {})
+        yield "record sale", ('post', reverse('sale_create'), {'data': {'item': item.pk, 'quantity_sold': 1}})
+        for period in PERIODS:
+            for format_name in [*FORMATS, *STREAM_FORMATS]:
+                yield f"export {period} {format_name}", (
+                    'get', reverse('export_sales', args=[period]), {'data': {'format': format_name}}
+                )
+
+    def run(self, client, request, options):
+        if not options["cached"]:
+            cache.clear()
+            caches['exports'].clear()
+        method, path, kwargs = request
+        response = getattr(client, method)(path, **kwargs)
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {path} returned {response.status_code}.")
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
+
+    def measure(self, client, request, options):
+        for _ in range(options["warmup"]):
+            self.run(client, request, options)
+        timings = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            size = self.run(client, request, options)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # Tracing slows everything down, so queries and memory come from one extra run.
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.run(client, request, options)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return timings, len(queries), peak, size
+
+    def report(self, name, measurement):
+        timings, queries, peak, size = measurement
+        if len(timings) > 1:
+            percentiles = statistics.quantiles(timings, n=20, method='inclusive')
+            p50, p95 = percentiles[9], percentiles[18]
+        else:
+            p50 = p95 = timings[0]
+        self.stdout.write(
+            f"{name:<24}{p50:>10.1f}{p95:>10.1f}{queries:>9}{peak / 2**20:>9.1f}{size / 1024:>9.0f}"
+        )
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main_g.inventory_import import InventoryFileError, import_inventory
+
+
+class Command(BaseCommand):
+    help = "Create or update one user's inventory from an .xlsx or .csv file, matching items by name."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path", help="An .xlsx or .csv file with name, price and quantity columns.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        path = Path(options["path"])
+        try:
+            with path.open("rb") as f:
+                result = import_inventory(user, f, path.name)
+        except (OSError, InventoryFileError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {result.created}, updated {result.updated}, skipped {len(result.errors)} item(s)."
+        ))
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main_g.batch import BatchError, parse_sales, record_sales
+
+
+class Command(BaseCommand):
+    help = "Record a JSON or CSV file of sales for one user in a single transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path", help="A .json or .csv file of sales (item, quantity_sold).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        path = Path(options["path"])
+        content_type = "text/csv" if path.suffix.lower() == ".csv" else "application/json"
+        try:
+            sales = record_sales(user, parse_sales(path.read_text(encoding="utf-8"), content_type))
+        except BatchError as e:
+            for error in e.errors:
+                row = "batch" if error["row"] is None else f"row {error['row']}"
+                self.stderr.write(f"{row}: {error['error']}")
+            raise CommandError("No sales were recorded.")
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded {len(sales)} sales."))
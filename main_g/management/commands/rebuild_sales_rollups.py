@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from main_g.models import DailySalesRollup, SalesRecord
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollup table from SalesRecord history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild rollups for this user id.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sales = SalesRecord.objects.all()
+        rollups = DailySalesRollup.objects.all()
+        if options["user"]:
+            sales = sales.filter(user_id=options["user"])
+            rollups = rollups.filter(user_id=options["user"])
+
+        days = (
+            sales.annotate(day=TruncDate('sale_date'))
+            .values('user_id', 'day')
+            .annotate(
+                quantity=Sum('quantity_sold'),
+                revenue=Sum('line_total'),
+                sale_count=Count('id'),
+            )
+            .order_by()
+        )
+
+        with transaction.atomic():
+            rollups.delete()
+            created = DailySalesRollup.objects.bulk_create(
+                (DailySalesRollup(**day) for day in days.iterator()),
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(created)} daily rollup rows."))
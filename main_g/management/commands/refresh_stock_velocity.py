@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils.timezone import localdate
+
+from main_g.stock import refresh_velocity
+
+
+class Command(BaseCommand):
+    help = "Recompute every item's sales velocity (run daily, e.g. from cron, after midnight)."
+
+    def handle(self, *args, **options):
+        today = localdate()
+        items = 0
+        for user in User.objects.filter(inventorylist__isnull=False).distinct().iterator():
+            items += refresh_velocity(user, today)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the velocity of {items} item(s)."))
@@ -0,0 +1,49 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from main_g.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued sales export jobs with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            workers = [
+                pool.submit(self.work, stop, options["poll"], options["once"])
+                for _ in range(options["workers"])
+            ]
+            try:
+                done = sum(worker.result() for worker in workers)
+            except KeyboardInterrupt:
+                stop.set()
+                done = sum(worker.result() for worker in workers)
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} export job(s)."))
+
+    def work(self, stop, poll, once):
+        done = 0
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                job = claim_next_job()
+                if job is None:
+                    if once:
+                        break
+                    time.sleep(poll)
+                    continue
+                job = run_job(job)
+                done += 1
+                self.stdout.write(f"Export job {job.pk}: {job.status}")
+        finally:
+            connection.close()
+        return done
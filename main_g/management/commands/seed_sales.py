@@ -0,0 +1,128 @@
+import random
+from collections import Counter
+from itertools import accumulate
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import localdate, make_aware
+
+from main_g.models import DailySalesRollup, InventoryList, SaleSequence, SalesRecord
+from main_g.stock import refresh_velocity
+
+
+# Relative trade by weekday (Monday first) and by hour of the day.
+WEEKDAY_WEIGHTS = [1.0, 0.9, 0.95, 1.0, 1.2, 1.4, 0.6]
+HOUR_WEIGHTS = [0] * 7 + [2, 5, 8, 9, 10, 12, 11, 9, 8, 9, 10, 8, 5, 2] + [0] * 3
+QUANTITY_WEIGHTS = [50, 25, 12, 8, 5]  # 1 to 5 units
+
+
+class Command(BaseCommand):
+    help = (
+        "Create USERS users with ITEMS inventory items each and SALES sales spread over "
+        "the last DAYS days (busier weekends and afternoons, slow growth, a few best "
+        "sellers), for benchmarking. The same --seed always produces the same data. "
+        "Rollups, sale id sequences and velocities are filled in to match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--items", type=int, default=200, help="Inventory items per user.")
+        parser.add_argument("--sales", type=int, default=100_000, help="Sales in total, across all users.")
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="bench", help="Usernames are <prefix>-0, <prefix>-1, ...")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users named {prefix}-* already exist; pick another --prefix.")
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            # Every seeded user gets the password "<prefix>"; hashing it once keeps this fast.
+            password = make_password(prefix)
+            users = User.objects.bulk_create(
+                User(username=f"{prefix}-{i}", password=password) for i in range(options["users"])
+            )
+            items = self.seed_inventory(users, options["items"], rng)
+            rollups = self.seed_sales(users, items, options, rng)
+            DailySalesRollup.objects.bulk_create(
+                (
+                    DailySalesRollup(user_id=user_id, day=day, quantity=q, revenue=r, sale_count=n)
+                    for (user_id, day), (q, r, n) in rollups.items()
+                ),
+                batch_size=options["batch_size"],
+            )
+            for user in users:
+                refresh_velocity(user, localdate())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {sum(len(i) for i in items.values())} items "
+            f"and {options['sales']} sales (password: {prefix!r})."
+        ))
+
+    def seed_inventory(self, users, count, rng):
+        items = InventoryList.objects.bulk_create(
+            InventoryList(
+                user=user,
+                name=f"Item {n:05d}",
+                price=Decimal(round(rng.lognormvariate(6, 0.8))) / 100 + 1,
+                quantity=rng.randint(0, 500),
+            )
+            for user in users for n in range(count)
+        )
+        by_user = {}
+        for item in items:
+            by_user.setdefault(item.user_id, []).append(item)
+        return by_user
+
+    def seed_sales(self, users, items, options, rng):
+        """Bulk insert the sales day by day and return the matching rollup totals."""
+        days = options["days"]
+        first_day = localdate() - timedelta(days=days - 1)
+        # Trade grows by half over the period, on top of the weekly pattern.
+        day_weights = [
+            WEEKDAY_WEIGHTS[(first_day + timedelta(days=d)).weekday()] * (1 + 0.5 * d / days) for d in range(days)
+        ]
+        per_day = Counter(rng.choices(range(days), weights=day_weights, k=options["sales"]))
+        # A long tail: the n-th most popular item sells about 1/n as often as the best seller.
+        popularity = list(accumulate(1 / rank for rank in range(1, options["items"] + 1)))
+        hour_weights = list(accumulate(HOUR_WEIGHTS))
+        quantity_weights = list(accumulate(QUANTITY_WEIGHTS))
+
+        rollups = {}
+        batch = []
+        for d in range(days):
+            day = first_day + timedelta(days=d)
+            count = per_day[d]
+            if not count:
+                continue
+            number = SaleSequence.allocate(day, count=count)
+            midnight = make_aware(datetime.combine(day, time.min))
+            seconds = sorted(
+                hour * 3600 + rng.randrange(3600)
+                for hour in rng.choices(range(24), cum_weights=hour_weights, k=count)
+            )
+            for second in seconds:
+                user = rng.choice(users)
+                item = rng.choices(items[user.pk], cum_weights=popularity)[0]
+                quantity = rng.choices(range(1, 6), cum_weights=quantity_weights)[0]
+                sold_at = midnight + timedelta(seconds=second)
+                batch.append(SalesRecord(
+                    user_id=user.pk, item_id=item.pk, quantity_sold=quantity, sale_date=sold_at,
+                    sale_id=SaleSequence.format(day, number),
+                    unit_price=item.price, line_total=item.price * quantity,
+                ))
+                number += 1
+                q, r, n = rollups.get((user.pk, day), (0, Decimal('0.00'), 0))
+                rollups[(user.pk, day)] = (q + quantity, r + item.price * quantity, n + 1)
+                if len(batch) >= options["batch_size"]:
+                    SalesRecord.objects.bulk_create(batch)
+                    batch = []
+        SalesRecord.objects.bulk_create(batch)
+        return rollups
@@ -0,0 +1,112 @@
+import logging
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# Totals per URL name seen by this process; each worker keeps its own.
+stats = defaultdict(Counter)
+
+
+class QueryTimer:
+    """``execute_wrapper`` that counts queries and adds up the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+
+
+def budget_for(view_name):
+    """The ``{'queries': n, 'ms': m}`` budget for ``view_name``; 0 means unchecked."""
+    budget = {'queries': settings.REQUEST_QUERY_BUDGET, 'ms': settings.REQUEST_TIME_BUDGET_MS}
+    budget.update(settings.REQUEST_BUDGETS.get(view_name, {}))
+    return budget
+
+
+def response_size(response):
+    if response.streaming:
+        # Streamed bodies are produced after the view returns; only a declared length is known.
+        return int(response.get('Content-Length', 0))
+    return len(response.content)
+
+
+class InstrumentationMiddleware:
+    """
+    Measure each request's query count, DB time, total time and response size.
+
+    The figures go out in a ``Server-Timing`` header, are added to ``stats``
+    under the URL name, and requests over their budget are logged as
+    warnings. For streaming responses only the work done before the first
+    byte is counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = perf_counter()
+        with ExitStack() as stack:
+            self.time_queries(stack, timer)
+            response = self.get_response(request)
+        return self.finish(request, response, timer, start)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        start = perf_counter()
+        # Connections belong to threads; the ORM's async calls all run in this
+        # request's thread-sensitive thread, so the wrappers go on there.
+        stack = ExitStack()
+        await sync_to_async(self.time_queries)(stack, timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, timer, start)
+
+    def time_queries(self, stack, timer):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+
+    def finish(self, request, response, timer, start):
+        total_ms = (perf_counter() - start) * 1000
+        db_ms = timer.duration * 1000
+
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{timer.count} queries", total;dur={total_ms:.1f}'
+        )
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        size = response_size(response)
+        stats[view_name or '<unresolved>'].update(
+            requests=1, queries=timer.count, db_ms=round(db_ms), total_ms=round(total_ms), bytes=size
+        )
+
+        budget = budget_for(view_name)
+        if (budget['queries'] and timer.count > budget['queries']) or (budget['ms'] and total_ms > budget['ms']):
+            logger.warning(
+                "%s %s (%s) over budget: %d queries, %.1f ms db, %.1f ms total, %d bytes",
+                request.method, request.path, view_name, timer.count, db_ms, total_ms, size,
+            )
+        return response
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def backfill_prices(apps, schema_editor):
+    # History has no record of past prices, so existing sales take the item's current price.
+    SalesRecord = apps.get_model('main_g', 'SalesRecord')
+    InventoryList = apps.get_model('main_g', 'InventoryList')
+    price = InventoryList.objects.filter(pk=OuterRef('item_id')).values('price')[:1]
+    SalesRecord.objects.filter(unit_price__isnull=True).update(unit_price=Subquery(price))
+    SalesRecord.objects.filter(line_total__isnull=True).update(
+        line_total=F('unit_price') * F('quantity_sold')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0003_dailysalesrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesrecord',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='salesrecord',
+            name='line_total',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='salesrecord',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='salesrecord',
+            name='line_total',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14),
+        ),
+    ]
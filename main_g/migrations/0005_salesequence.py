@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:59
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def seed_sequences(apps, schema_editor):
+    # Legacy ids numbered each day's sales from 1, so continue after that day's count.
+    SalesRecord = apps.get_model('main_g', 'SalesRecord')
+    SaleSequence = apps.get_model('main_g', 'SaleSequence')
+    days = (
+        SalesRecord.objects.annotate(day=TruncDate('sale_date'))
+        .values('day').annotate(last_value=Count('id')).order_by()
+    )
+    SaleSequence.objects.bulk_create(SaleSequence(**day) for day in days)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0004_salesrecord_price_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
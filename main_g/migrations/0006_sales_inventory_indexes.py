@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0005_salesequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorylist',
+            index=models.Index(fields=['user', 'name'], name='inventory_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesrecord',
+            index=models.Index(fields=['user', 'sale_date'], name='sales_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicates(apps, schema_editor):
+    # Keep the oldest item's name and number the others, so no item (or its sales) is lost.
+    InventoryList = apps.get_model('main_g', 'InventoryList')
+    duplicated = (
+        InventoryList.objects.values('user_id', 'name')
+        .annotate(n=Count('id')).filter(n__gt=1).order_by()
+    )
+    for group in duplicated:
+        items = InventoryList.objects.filter(user_id=group['user_id'], name=group['name']).order_by('id')
+        taken = set(InventoryList.objects.filter(user_id=group['user_id']).values_list('name', flat=True))
+        for item in items[1:]:
+            base, copy = group['name'][:190], 2  # leave room for the suffix within max_length
+            while f"{base} ({copy})" in taken:
+                copy += 1
+            item.name = f"{base} ({copy})"
+            taken.add(item.name)
+            item.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0007_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='inventorylist',
+            name='inventory_user_name_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='inventorylist',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_inventory_item_name'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0008_unique_inventory_item_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorylist',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, help_text='Flag the item when stock falls to this level. Leave blank to use recent sales velocity.', null=True),
+        ),
+        migrations.AddField(
+            model_name='inventorylist',
+            name='velocity',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inventorylist',
+            name='velocity_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='salesrecord',
+            name='sale_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
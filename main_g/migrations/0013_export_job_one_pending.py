@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:07
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fail_duplicate_pending(apps, schema_editor):
+    # Keep the oldest pending job of each export; the worker would render the others for nothing.
+    ExportJob = apps.get_model('main_g', 'ExportJob')
+    key = ['user_id', 'period', 'anchor', 'format', 'watermark']
+    duplicated = (
+        ExportJob.objects.filter(status='pending').values(*key)
+        .annotate(n=Count('id')).filter(n__gt=1).order_by()
+    )
+    for group in duplicated:
+        jobs = ExportJob.objects.filter(status='pending', **{field: group[field] for field in key}).order_by('id')
+        ExportJob.objects.filter(pk__in=[job.pk for job in jobs[1:]]).update(
+            status='failed', error="Duplicate of an export already queued."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_g', '0012_exportjob_started_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_pending, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='exportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('user', 'period', 'anchor', 'format', 'watermark'), name='export_job_one_pending'),
+        ),
+    ]
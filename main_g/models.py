@@ -1,5 +1,6 @@
-from django.db import models
-from django.db.models import Model
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Model
 from django.contrib.auth.models import User
 from django.utils.timezone import now
 
@@ -7,38 +8,207 @@ from django.utils.timezone import now
 # Create your models here.
 
 
+class InsufficientStock(Exception):
+    """Raised when a sale asks for more units than the item has left."""
+
+
 class InventoryList(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
     name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField(default=0)
+    reorder_level = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Flag the item when stock falls to this level. Leave blank to use recent sales velocity.",
+    )
+    # Units sold per day over the last STOCK_VELOCITY_DAYS, recomputed by stock.refresh_velocity
+    # once a day and nudged up by every sale in between.
+    velocity = models.FloatField(default=0)
+    velocity_date = models.DateField(null=True, blank=True)
+    # Bumped by every change clients can see (not velocity), for the API's updated_since sync.
+    # Bulk UPDATEs skip auto_now, so they set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Items are looked up (and imported) by name, so a name means one item per user.
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_inventory_item_name'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='inventory_user_updated_idx'),
+        ]
+
+    def reserve(self, quantity):
+        """
+        Take ``quantity`` units out of stock with a single conditional UPDATE.
+
+        Returns False, leaving stock untouched, if fewer than ``quantity`` units are left.
+        The same UPDATE adds the sale to the item's velocity.
+        """
+        reserved = InventoryList.objects.filter(pk=self.pk, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity,
+            velocity=F('velocity') + quantity / settings.STOCK_VELOCITY_DAYS,
+            updated_at=now(),
+        )
+        return bool(reserved)
 
     def __str__(self):
         return f"{self.name}, {self.price}, {self.quantity}"
 
 
+class SaleSequence(models.Model):
+    """Last sale number handed out for each day; sale_ids are allocated from here."""
+    day = models.DateField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, day, count=1):
+        """Reserve ``count`` consecutive numbers for ``day`` and return the first one."""
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(day=day)
+            cls.objects.filter(pk=sequence.pk).update(last_value=F('last_value') + count)
+        return sequence.last_value + 1
+
+    @staticmethod
+    def format(day, number):
+        return f"{day.strftime('%Y-%m%d')}-{number:04d}"
+
+
 class SalesRecord(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
     sale_id = models.CharField(max_length=20, unique=True, blank=True)
     item = models.ForeignKey(InventoryList, on_delete=models.CASCADE)
     quantity_sold = models.PositiveIntegerField()
-    sale_date = models.DateTimeField(auto_now_add=True)
+    # Defaults to now rather than auto_now_add so batches from offline tills can keep their own times.
+    sale_date = models.DateTimeField(default=now, editable=False)
+
+    # Snapshotted when the sale is saved so later price edits don't rewrite history.
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True)
+    line_total = models.DecimalField(max_digits=14, decimal_places=2, blank=True)
+    # When the row was written, unlike sale_date which imports can backdate; drives updated_since sync.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'sale_date'], name='sales_user_date_idx'),
+            models.Index(fields=['user', 'updated_at'], name='sales_user_updated_idx'),
+        ]
+
+    SALE_ID_ATTEMPTS = 5
 
     def save(self, *args, **kwargs):
-        if not self.sale_id:
-            today = now().date()
-            date_str = today.strftime("%Y-%m%d")
+        generate_id = not self.sale_id
 
-            # Count how many sales already exist for today
-            count_today = SalesRecord.objects.filter(sale_date__date=today).count() + 1
-            self.sale_id = f"{date_str}-{count_today:04d}"
+        if self.unit_price is None:
+            self.unit_price = self.item.price
+        self.line_total = self.unit_price * self.quantity_sold
 
-        super().save(*args, **kwargs)
+        for attempt in range(self.SALE_ID_ATTEMPTS):
+            if generate_id:
+                today = now().date()
+                self.sale_id = SaleSequence.format(today, SaleSequence.allocate(today))
+            try:
+                # Keep the insert and the post_save bookkeeping (stock, rollups) in one transaction.
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Ids issued before the sequence existed can still collide; take the next number.
+                last_attempt = attempt == self.SALE_ID_ATTEMPTS - 1
+                if not generate_id or last_attempt or not SalesRecord.objects.filter(sale_id=self.sale_id).exists():
+                    raise
 
     def total_sale_amount(self):
-        return self.item.price * self.quantity_sold
+        return self.line_total
+
+    def __str__(self):
+        return f"{self.quantity_sold} x {self.unit_price} on {self.sale_date}"
+
+
+class DailySalesRollup(models.Model):
+    """Per-user, per-day sales totals maintained by the SalesRecord signals."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    day = models.DateField()
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sale_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_sales_rollup'),
+        ]
+
+    @classmethod
+    def add(cls, user_id, day, quantity, revenue, sale_count):
+        """
+        Add the given amounts (negative to subtract) to a day's row.
+
+        Rows are only created for positive changes, so removing sales never
+        resurrects the row of a user that is being deleted.
+        """
+        rollups = cls.objects.filter(user_id=user_id, day=day)
+        changes = {
+            'quantity': F('quantity') + quantity,
+            'revenue': F('revenue') + revenue,
+            'sale_count': F('sale_count') + sale_count,
+        }
+        if rollups.update(**changes) or sale_count < 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    user_id=user_id, day=day, quantity=quantity, revenue=revenue, sale_count=sale_count
+                )
+        except IntegrityError:
+            # Another request created the day's row first.
+            rollups.update(**changes)
+
+    def __str__(self):
+        return f"{self.day}: {self.sale_count} sales, {self.revenue}"
+
+
+class ExportJob(models.Model):
+    """A sales export rendered in the background by the run_export_jobs command."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    period = models.CharField(max_length=10)
+    anchor = models.DateField(help_text="The day the period is relative to.")
+    format = models.CharField(max_length=10)
+    watermark = models.CharField(max_length=50, help_text="reports.sales_watermark of the exported range.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    file = models.FileField(upload_to='exports/%Y/%m/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'period', 'anchor', 'format'], name='export_job_lookup_idx'),
+            models.Index(fields=['status', 'created_at'], name='export_job_queue_idx'),
+        ]
+        constraints = [
+            # Two requests racing to queue the same export must not both succeed.
+            models.UniqueConstraint(
+                fields=['user', 'period', 'anchor', 'format', 'watermark'],
+                condition=models.Q(status='pending'),
+                name='export_job_one_pending',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.quantity_sold} x {self.item.price} on {self.sale_date}"
\ No newline at end of file
+        return f"{self.period} {self.format} export for {self.user} ({self.status})"
@@ -0,0 +1,51 @@
+import base64
+from datetime import datetime
+
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+
+
+def encode_position(when, pk):
+    """Opaque cursor for the ``(timestamp, id)`` position of a row in a keyset walk."""
+    raw = f"{when.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_position(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        when, pk = raw.split("|")
+        return datetime.fromisoformat(when), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise BadRequest("Invalid page cursor.")
+
+
+def encode_cursor(sale):
+    """Opaque cursor pointing just past ``sale`` in newest-first order."""
+    return encode_position(sale.sale_date, sale.pk)
+
+
+class KeysetPage:
+    """
+    One page of a newest-first ``(sale_date, id)`` keyset walk.
+
+    Seeking past the cursor with a WHERE clause (instead of OFFSET) lets the
+    ``(user, sale_date)`` index jump straight to the page, so page 1000 costs
+    the same as page 1.
+    """
+
+    def __init__(self, queryset, cursor=None, size=25):
+        queryset = queryset.order_by('-sale_date', '-id')
+        if cursor:
+            sale_date, pk = decode_position(cursor)
+            queryset = queryset.filter(Q(sale_date__lt=sale_date) | Q(sale_date=sale_date, id__lt=pk))
+        rows = list(queryset[:size + 1])
+        self.object_list = rows[:size]
+        self.has_next = len(rows) > size
+        self.next_cursor = encode_cursor(self.object_list[-1]) if self.has_next else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
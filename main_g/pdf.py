@@ -0,0 +1,144 @@
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from .reports import report_sections
+
+
+FONT = "Helvetica"
+BOLD_FONT = "Helvetica-Bold"
+FONT_SIZE = 9
+TITLE_SIZE = 14
+MARGIN = 1.5 * cm
+LINE_HEIGHT = 0.55 * cm
+CELL_PADDING = 0.15 * cm
+
+# (heading, width, right aligned)
+DATE = ("Date", 4.0 * cm, False)
+SALE_ID = ("ID No.", 2.8 * cm, False)
+ITEM = ("Item", 4.6 * cm, False)
+QUANTITY = ("Qty", 1.6 * cm, True)
+PRICE = ("Price", 2.5 * cm, True)
+TOTAL = ("Total", 2.5 * cm, True)
+SOLD_AT = ("Date", 3.0 * cm, False)
+
+COLUMNS = [SALE_ID, ITEM, QUANTITY, PRICE, TOTAL, SOLD_AT]
+GROUPED_COLUMNS = [DATE, SALE_ID, ITEM, QUANTITY, PRICE, TOTAL]
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+class TableWriter:
+    """
+    Draws fixed-width columns onto an A4 canvas.
+
+    Each page is flushed with ``showPage`` as soon as it is full, and the
+    section title and column headings are repeated at the top of every page.
+    """
+
+    def __init__(self, out):
+        self.canvas = canvas.Canvas(out, pagesize=A4, pageCompression=1)
+        self.width, self.height = A4
+        self.columns = None
+        self.title = None
+        self.y = None
+
+    def section(self, title, columns):
+        """Start a new section on a fresh page."""
+        if self.y is not None:
+            self.canvas.showPage()
+        self.title = title
+        self.columns = columns
+        self._page_top()
+
+    def _page_top(self, continued=False):
+        c = self.canvas
+        self.y = self.height - MARGIN
+        c.setFont(BOLD_FONT, TITLE_SIZE)
+        c.drawString(MARGIN, self.y, f"Sales Report: {self.title}" + (" (cont.)" if continued else ""))
+        self.y -= LINE_HEIGHT * 2
+        self._draw([heading for heading, _, _ in self.columns], bold=True)
+        c.line(MARGIN, self.y + LINE_HEIGHT * 0.6, self.width - MARGIN, self.y + LINE_HEIGHT * 0.6)
+
+    def _draw(self, values, bold=False):
+        c = self.canvas
+        font = BOLD_FONT if bold else FONT
+        c.setFont(font, FONT_SIZE)
+        x = MARGIN
+        for value, (_, width, right) in zip(values, self.columns):
+            text = self._fit("" if value is None else str(value), font, width - 2 * CELL_PADDING)
+            if right:
+                c.drawRightString(x + width - CELL_PADDING, self.y, text)
+            else:
+                c.drawString(x + CELL_PADDING, self.y, text)
+            x += width
+        self.y -= LINE_HEIGHT
+
+    @staticmethod
+    def _fit(text, font, width):
+        if stringWidth(text, font, FONT_SIZE) <= width:
+            return text
+        while text and stringWidth(text + "...", font, FONT_SIZE) > width:
+            text = text[:-1]
+        return text + "..."
+
+    def row(self, values, bold=False):
+        if self.y < MARGIN + LINE_HEIGHT:
+            self.canvas.showPage()
+            self._page_top(continued=True)
+        self._draw(values, bold=bold)
+
+    def save(self):
+        self.canvas.showPage()
+        self.canvas.save()
+
+
+def _write_grouped(table, group):
+    for day in group.days():
+        table.row([day.start.strftime("%a, %Y-%m-%d")], bold=True)
+        for row in day.rows():
+            table.row(["", row.sale_id, row.item, row.quantity, _money(row.price), _money(row.total)])
+        table.row(["", "", "", "", "Subtotal", _money(day.total)], bold=True)
+    table.row(["", "", "", "", "TOTAL", _money(group.total)], bold=True)
+
+
+def write_pdf(out, report, period, today):
+    """Render ``report`` straight from its row stream into a PDF written to ``out``."""
+    table = TableWriter(out)
+
+    if period == 'day':
+        table.section(today.strftime("%Y-%m-%d"), COLUMNS)
+        for row in report.rows():
+            table.row([
+                row.sale_id,
+                row.item,
+                row.quantity,
+                _money(row.price),
+                _money(row.total),
+                row.sold_at.strftime("%Y-%m-%d %H:%M"),
+            ])
+        table.row(["", "TOTAL", "", "", _money(report.total), ""], bold=True)
+
+    elif period == 'week':
+        table.section(f"Week of {today.strftime('%Y-%m-%d')}", GROUPED_COLUMNS)
+        _write_grouped(table, report)
+
+    elif period == 'month':
+        for week in report.weeks():
+            table.section(f"Week of {week.start.strftime('%Y-%m-%d')}", GROUPED_COLUMNS)
+            _write_grouped(table, week)
+
+    table.save()
+
+
+
+def write_range_pdf(out, report, granularity):
+    """Render a date-range export of ``report`` with a section per ``granularity`` span to ``out``."""
+    table = TableWriter(out)
+    for title, group in report_sections(report, granularity):
+        table.section(title, GROUPED_COLUMNS)
+        _write_grouped(table, group)
+    table.save()
@@ -0,0 +1,261 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max, Q, Sum
+from django.utils.timezone import localtime, make_aware
+
+from .models import DailySalesRollup, SalesRecord
+
+
+ONE_DAY = timedelta(days=1)
+
+
+def period_bounds(period, today):
+    """Return the half-open ``(start, end)`` date range covered by ``period``."""
+    if period == 'day':
+        return today, today + ONE_DAY
+    if period == 'week':
+        start = today - timedelta(days=today.weekday())  # Monday
+        return start, start + timedelta(days=7)
+    if period == 'month':
+        start = today.replace(day=1)
+        return start, next_month(start)
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+def next_month(day):
+    """The first day of the month after ``day``'s."""
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def day_start(day):
+    """Midnight at the start of ``day`` in the current time zone."""
+    return make_aware(datetime.combine(day, time.min))
+
+
+def sale_date_range(start, end):
+    """
+    Lookups for sales dated in ``[start, end)``.
+
+    Comparing ``sale_date`` against datetimes (rather than ``sale_date__date``)
+    keeps the column bare so the ``(user, sale_date)`` index can be used.
+    """
+    return {'sale_date__gte': day_start(start), 'sale_date__lt': day_start(end)}
+
+
+def sales_range_stats(user, start, end):
+    """Newest id (``last``), row count and latest ``updated_at`` (``modified``) of the user's sales in ``[start, end)``."""
+    return SalesRecord.objects.filter(user=user, **sale_date_range(start, end)).aggregate(
+        last=Max('id'), count=Count('id'), modified=Max('updated_at')
+    )
+
+
+def format_watermark(stats):
+    modified = stats['modified'] and int(stats['modified'].timestamp() * 1_000_000)
+    return f"{stats['last'] or 0}-{stats['count']}-{modified or 0}"
+
+
+def sales_watermark(user, start, end):
+    """
+    Cheap fingerprint of the user's sales in ``[start, end)``.
+
+    The newest id and the row count change whenever a sale is added to or
+    removed from the range, and the newest ``updated_at`` whenever one is
+    edited or its item renamed, so anything rendered from the range can be
+    reused while the watermark stays the same.
+    """
+    return format_watermark(sales_range_stats(user, start, end))
+
+
+def _totals_query(user, today):
+    start_of_week = today - timedelta(days=today.weekday())  # Monday
+    start_of_month = today.replace(day=1)
+    rollups = DailySalesRollup.objects.filter(user=user, day__gte=min(start_of_week, start_of_month))
+    return rollups, dict(
+        today=Sum('revenue', filter=Q(day=today)),
+        week=Sum('revenue', filter=Q(day__gte=start_of_week)),
+        month=Sum('revenue', filter=Q(day__gte=start_of_month)),
+    )
+
+
+def sales_totals(user, today):
+    """Today's, this week's and this month's revenue, summed from the daily rollups in one query."""
+    rollups, aggregates = _totals_query(user, today)
+    return {period: total or 0 for period, total in rollups.aggregate(**aggregates).items()}
+
+
+async def asales_totals(user, today):
+    """``sales_totals`` for async views."""
+    rollups, aggregates = _totals_query(user, today)
+    return {period: total or 0 for period, total in (await rollups.aaggregate(**aggregates)).items()}
+
+
+class SaleRow(NamedTuple):
+    sale_id: str
+    item: str
+    quantity: int
+    price: Decimal
+    total: Decimal
+    sold_at: datetime
+
+    @property
+    def day(self):
+        return self.sold_at.date()
+
+
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def sales_rows(user, start, end, chunk_size=ITERATOR_CHUNK_SIZE):
+    """
+    Yield one SaleRow per sale in ``[start, end)``, oldest first, from a single query.
+
+    Rows are read as tuples through ``iterator()`` (a server-side cursor on
+    PostgreSQL), so large periods are never materialised as a whole queryset
+    and no model instances are built.
+    """
+    sales = (
+        SalesRecord.objects
+        .filter(user=user, **sale_date_range(start, end))
+        .order_by('sale_date', 'id')
+        .values_list('sale_id', 'item__name', 'quantity_sold', 'unit_price', 'line_total', 'sale_date')
+    )
+    for sale_id, item, quantity, price, total, sold_at in sales.iterator(chunk_size=chunk_size):
+        yield SaleRow(sale_id, item, quantity, price, total, localtime(sold_at))
+
+
+async def asales_rows(user, start, end, chunk_size=ITERATOR_CHUNK_SIZE):
+    """
+    ``sales_rows`` as an async iterator; only the chunk fetches borrow a thread.
+
+    ``values_list().aiterator()`` runs its query on the event loop in Django
+    5.2, so the sync generator is advanced a chunk at a time instead. Every
+    fetch goes to the same thread-sensitive thread, keeping the cursor on the
+    connection that opened it.
+    """
+    rows = sales_rows(user, start, end, chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while chunk := await next_chunk():
+        for row in chunk:
+            yield row
+
+
+class _Source:
+    """Iterator over SaleRows that can look at the next row's day without consuming it."""
+
+    _EMPTY = object()
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._next = self._EMPTY  # the query only runs once the first row is needed
+
+    def peek_day(self):
+        if self._next is self._EMPTY:
+            self._next = next(self._rows, None)
+        return self._next.day if self._next is not None else None
+
+    def pop(self):
+        self.peek_day()
+        row, self._next = self._next, next(self._rows, None)
+        return row
+
+
+class SalesGroup:
+    """
+    A slice of the report covering ``[start, end)``.
+
+    Rows are pulled lazily from the shared ordered source, so a group must be
+    consumed in order. ``count``, ``quantity`` and ``total`` accumulate as rows
+    are read (and roll up into the parent group), so they are final once the
+    group has been iterated.
+    """
+
+    def __init__(self, source, start, end, parent=None):
+        self._source = source
+        self.start = start
+        self.end = end
+        self.parent = parent
+        self.count = 0
+        self.quantity = 0
+        self.total = Decimal('0.00')
+
+    def _record(self, row):
+        group = self
+        while group is not None:
+            group.count += 1
+            group.quantity += row.quantity
+            group.total += row.total
+            group = group.parent
+
+    def _drain(self):
+        for _ in self.rows():
+            pass
+
+    def rows(self):
+        source = self._source
+        while (day := source.peek_day()) is not None and day < self.end:
+            row = source.pop()
+            self._record(row)
+            yield row
+
+    def days(self):
+        """Yield a group for every day in the range that has sales."""
+        source = self._source
+        while (day := source.peek_day()) is not None and day < self.end:
+            group = SalesGroup(source, day, day + ONE_DAY, parent=self)
+            yield group
+            group._drain()
+
+    def _spans(self, first_start, next_start):
+        span_start = first_start
+        while span_start < self.end:
+            span_end = next_start(span_start)
+            group = SalesGroup(
+                self._source, max(span_start, self.start), min(span_end, self.end), parent=self
+            )
+            yield group
+            group._drain()
+            span_start = span_end
+
+    def weeks(self):
+        """Yield a group for every ISO week overlapping the range, with or without sales."""
+        monday = self.start - timedelta(days=self.start.weekday())
+        return self._spans(monday, lambda start: start + timedelta(days=7))
+
+    def months(self):
+        """Yield a group for every calendar month overlapping the range, with or without sales."""
+        return self._spans(self.start.replace(day=1), next_month)
+
+
+class SalesReport(SalesGroup):
+    """All of a user's sales in ``[start, end)``, fetched with one ordered query."""
+
+    def __init__(self, user, start: date, end: date):
+        super().__init__(_Source(sales_rows(user, start, end)), start, end)
+        self.user = user
+
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def report_sections(report, granularity):
+    """
+    Yield ``(title, group)`` for each section of a date-range export.
+
+    ``'day'`` keeps the whole range in one section (grouped by day inside it),
+    ``'week'`` and ``'month'`` give one section per week or calendar month.
+    """
+    if granularity == 'day':
+        yield f"{report.start:%Y-%m-%d} to {report.end - ONE_DAY:%Y-%m-%d}", report
+    elif granularity == 'week':
+        for week in report.weeks():
+            monday = week.start - timedelta(days=week.start.weekday())
+            yield f"Week of {monday:%Y-%m-%d}", week
+    elif granularity == 'month':
+        for month in report.months():
+            yield f"{month.start:%B %Y}", month
+    else:
+        raise ValueError(f"Unknown granularity: {granularity!r}")
@@ -1,10 +1,65 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import SalesRecord
+from django.utils.timezone import localdate, now
+from .caching import invalidate_sales_totals
+from .models import DailySalesRollup, InsufficientStock, InventoryList, SalesRecord
+
+
+def adjust_rollup(sale, sign=1):
+    """Add (or with ``sign=-1`` remove) one sale to its day's rollup row."""
+    DailySalesRollup.add(
+        sale.user_id, localdate(sale.sale_date),
+        sign * sale.quantity_sold, sign * sale.total_sale_amount(), sign,
+    )
+
+
+@receiver(pre_save, sender=SalesRecord)
+def remember_stored_sale(sender, instance, raw=False, **kwargs):
+    # An edit (e.g. in the admin) moves the rollups by the difference, so keep the row as stored.
+    instance._stored = None
+    if instance.pk is not None and not raw:
+        instance._stored = SalesRecord.objects.filter(pk=instance.pk).first()
+
 
 @receiver(post_save, sender=SalesRecord)
 def update_inventory(sender, instance, created, **kwargs):
     if created:
-        item = instance.item
-        item.quantity -= instance.quantity_sold
-        item.save()
\ No newline at end of file
+        # Runs inside SalesRecord.save's transaction, so raising here also undoes the insert.
+        if not instance.item.reserve(instance.quantity_sold):
+            raise InsufficientStock(instance.item.name)
+        adjust_rollup(instance)
+        invalidate_sales_totals(instance.user_id)
+    elif getattr(instance, '_stored', None) is not None:
+        # Take the old figures out of their day and put the new ones in, which also
+        # covers a sale moved to another day.
+        adjust_rollup(instance._stored, sign=-1)
+        adjust_rollup(instance)
+        invalidate_sales_totals(instance.user_id)
+
+
+@receiver(post_delete, sender=SalesRecord)
+def remove_from_rollup(sender, instance, **kwargs):
+    adjust_rollup(instance, sign=-1)
+    invalidate_sales_totals(instance.user_id)
+
+
+@receiver(pre_save, sender=InventoryList)
+def remember_stored_name(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_name = None
+    if instance.pk is not None and not raw and (update_fields is None or 'name' in update_fields):
+        instance._stored_name = InventoryList.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=InventoryList)
+def touch_renamed_item_sales(sender, instance, created, **kwargs):
+    # Exports and the sync API print the item's name on each sale, so a rename
+    # has to count as a change to those sales.
+    stored = getattr(instance, '_stored_name', None)
+    if not created and stored is not None and stored != instance.name:
+        SalesRecord.objects.filter(item=instance).update(updated_at=now())
+
+
+@receiver(post_delete, sender=InventoryList)
+def inventory_deleted(sender, instance, **kwargs):
+    # Its sales are cascaded away with it, which changes the totals.
+    invalidate_sales_totals(instance.user_id)
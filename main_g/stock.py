@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .models import InventoryList, SalesRecord
+from .reports import day_start
+
+
+def refresh_velocity(user, today):
+    """
+    Recompute the velocity of all of ``user``'s items from the last
+    ``STOCK_VELOCITY_DAYS`` of sales, in a single UPDATE.
+
+    Each item's units come from a correlated SUM that reads only that item's
+    sales through the ``item_id`` index, so a refresh touches every sale at
+    most once instead of scanning items × sales. Returns the number of items
+    updated.
+    """
+    window = settings.STOCK_VELOCITY_DAYS
+    since = day_start(today - timedelta(days=window - 1))
+    units_sold = (
+        SalesRecord.objects.filter(item=OuterRef('pk'), sale_date__gte=since)
+        .order_by().values('item').annotate(units=Sum('quantity_sold')).values('units')
+    )
+    return InventoryList.objects.filter(user=user).update(
+        velocity=Coalesce(Cast(Subquery(units_sold), FloatField()), Value(0.0)) / window,
+        velocity_date=today,
+    )
+
+
+def ensure_fresh_velocity(user, today):
+    """Refresh ``user``'s velocities if they were last computed before ``today``."""
+    stale = InventoryList.objects.filter(user=user).exclude(velocity_date=today)
+    if stale.exists():
+        refresh_velocity(user, today)
+
+
+def with_cover(items):
+    """
+    Annotate ``items`` with ``threshold`` (the explicit reorder level, else
+    ``STOCK_LEAD_TIME_DAYS`` of sales at the current velocity) and
+    ``days_of_cover`` (stock divided by velocity, None when nothing sells).
+    """
+    return items.annotate(
+        threshold=Coalesce(
+            Cast('reorder_level', FloatField()), F('velocity') * settings.STOCK_LEAD_TIME_DAYS
+        ),
+        days_of_cover=Case(
+            When(velocity__gt=0, then=Cast('quantity', FloatField()) / F('velocity')),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def low_stock(user):
+    """``user``'s items at or below their threshold, the ones running out soonest first."""
+    return (
+        with_cover(InventoryList.objects.filter(user=user))
+        .filter(quantity__lte=F('threshold'))
+        .order_by(F('days_of_cover').asc(nulls_last=True), 'name')
+    )
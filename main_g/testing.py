@@ -0,0 +1,21 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for holding views to a maximum number of queries."""
+
+    def assertQueryBudget(self, budget, path, method='get', **kwargs):
+        """
+        Request ``path`` with the test client and fail if it runs more than
+        ``budget`` queries. Streamed content is consumed inside the count, so
+        queries made while streaming are included. Returns the response.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, **kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        if len(queries) > budget:
+            executed = "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(queries.captured_queries, 1))
+            self.fail(f"{method.upper()} {path} ran {len(queries)} queries, budget is {budget}:\n{executed}")
+        return response
@@ -1,12 +1,28 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("inventory/", views.InventoryListView.as_view(), name="inventory"),
     path("inventory/create/", views.CreateInventoryView.as_view(), name="create"),
+    path("inventory/import/", views.import_inventory_view, name="inventory_import"),
+    path("inventory/low-stock/", views.LowStockView.as_view(), name="low_stock"),
     path("inventory/<int:pk>/delete/", views.DeleteInventoryView.as_view(), name="delete"),
     path("sales/new/", views.CreateSalesView.as_view(), name="sale_create"),
+    path("sales/batch/", views.batch_sales, name="sale_batch"),
     path("sales/", views.SalesListView.as_view(), name="sales_list"),
+    path("sales/summary/", views.sales_summary, name="sales_summary"),
+    path("sales/analytics/", views.SalesAnalyticsView.as_view(), name="sales_analytics"),
+    path('export/range/', views.export_sales_range, name='export_sales_range'),
     path('export/<str:period>/', views.export_sales, name='export_sales'),
+    path('export/<str:period>/async/', views.export_sales_async, name='export_sales_async'),
+    path('export/jobs/<int:pk>/', views.export_job, name='export_job'),
+    path('export/jobs/<int:pk>/download/', views.export_job_download, name='export_job_download'),
+    path("cache-stats/", views.cache_stats, name="cache_stats"),
+    path("request-stats/", views.request_stats, name="request_stats"),
+    path("api/inventory/", api.inventory_list, name="api_inventory"),
+    path("api/inventory/<int:pk>/", api.inventory_item, name="api_inventory_item"),
+    path("api/sales/", api.sales_list, name="api_sales"),
+    path("api/sales/<int:pk>/", api.sale, name="api_sale"),
+    path("api/totals/", api.totals, name="api_totals"),
 
 ]
\ No newline at end of file
@@ -1,48 +1,125 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.models import User
-from django.urls import reverse_lazy
-from django.views.generic import ListView
+from django.urls import reverse, reverse_lazy
+from django.views.generic import ListView, TemplateView
 from django.views.generic.edit import CreateView, DeleteView
-from .models import InventoryList, SalesRecord
-from .forms import SalesRecordForm
-from django.db.models import Sum, F
-from django.utils.timezone import now
-from django.http import HttpResponse
-from openpyxl import Workbook, load_workbook
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-from io import BytesIO
-from openpyxl.styles import Font
-from datetime import timedelta
+from .models import ExportJob, InsufficientStock, InventoryList, SalesRecord
+from . import caching, middleware
+from .batch import BatchError, parse_sales, record_sales
+from .caching import acached_sales_totals, cached_sales_totals
+from .exports import (
+    DEFAULT_FORMAT, FORMATS, STREAM_FORMATS, aread_file, astream_rows, export_filename, get_format, known_format,
+    range_filename, stream_rows,
+)
+from .forms import ExportRangeForm, InventoryImportForm, SalesRecordForm
+from .inventory_import import InventoryFileError, import_inventory
+from .jobs import request_export
+from .pagination import KeysetPage
+from .stock import ensure_fresh_velocity, low_stock
+from .reports import ONE_DAY, SalesReport, asales_rows, period_bounds, sales_rows
+from django.utils.timezone import localdate, now
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from datetime import date, timedelta
+from django.core.exceptions import BadRequest
+import os
 
 
 
 
 # All links need review
 # Create your views here.
-class InventoryListView(LoginRequiredMixin, ListView):
+class JsonListMixin:
+    """Serve ``?format=json`` as a compact JSON page instead of rendering the template."""
+
+    def wants_json(self):
+        return self.request.GET.get('format') == 'json'
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.wants_json():
+            return JsonResponse(self.get_json_data(context))
+        return super().render_to_response(context, **response_kwargs)
+
+
+def inventory_json(item):
+    return {'id': item.pk, 'name': item.name, 'price': str(item.price), 'quantity': item.quantity}
+
+
+def sale_json(sale):
+    return {
+        'sale_id': sale.sale_id,
+        'item': sale.item.name,
+        'quantity_sold': sale.quantity_sold,
+        'unit_price': str(sale.unit_price),
+        'line_total': str(sale.line_total),
+        'sale_date': sale.sale_date.isoformat(),
+    }
+
+
+class InventoryListView(LoginRequiredMixin, JsonListMixin, ListView):
     model = InventoryList
     template_name = 'main_g/inv_list.html'
     context_object_name = 'inventory'
+    paginate_by = 50
 
     def get_queryset(self):
-        return InventoryList.objects.filter(user=self.request.user)
+        return InventoryList.objects.filter(user=self.request.user).order_by('name', 'id')
+
+    def get_json_data(self, context):
+        page = context['page_obj']
+        return {
+            'results': [inventory_json(item) for item in page],
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'next_page': page.next_page_number() if page.has_next() else None,
+        }
 
 
 
+class LowStockView(LoginRequiredMixin, JsonListMixin, ListView):
+    """Items at or below their reorder point, with days of cover at the current sales velocity."""
+    template_name = 'main_g/low_stock.html'
+    context_object_name = 'items'
+
+    def get_queryset(self):
+        ensure_fresh_velocity(self.request.user, localdate())
+        return low_stock(self.request.user)
+
+    def get_json_data(self, context):
+        return {
+            'results': [
+                dict(
+                    inventory_json(item),
+                    reorder_level=item.reorder_level,
+                    threshold=round(item.threshold, 2),
+                    velocity=round(item.velocity, 2),
+                    days_of_cover=None if item.days_of_cover is None else round(item.days_of_cover, 1),
+                )
+                for item in context['items']
+            ],
+        }
+
+
 class CreateInventoryView(CreateView):
     model = InventoryList
     fields = [
-        'name', 'price', 'quantity'
+        'name', 'price', 'quantity', 'reorder_level'
     ]
     template_name = "main_g/create_inv.html"
     success_url = reverse_lazy("inventory")
 
     def form_valid(self, form):
         form.instance.user = self.request.user
+        if InventoryList.objects.filter(user=self.request.user, name=form.cleaned_data['name']).exists():
+            form.add_error('name', "You already have an item with this name.")
+            return self.form_invalid(form)
         return super().form_valid(form)
 
 
@@ -55,6 +132,30 @@ class DeleteInventoryView(DeleteView):
         return  InventoryList.objects.filter(user=self.request.user)
 
 
+@login_required
+def import_inventory_view(request):
+    """
+    Upload an .xlsx/.csv inventory file and upsert it by item name.
+
+    Renders the per-row error report, or returns it as JSON with ``?format=json``.
+    """
+    result = file_error = None
+    form = InventoryImportForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        try:
+            result = import_inventory(request.user, upload, upload.name)
+        except InventoryFileError as e:
+            file_error = str(e)
+
+    if request.GET.get('format') == 'json' and request.method == 'POST':
+        if result is None:
+            errors = [{'row': None, 'error': file_error or "Upload a file."}]
+            return JsonResponse({'errors': errors}, status=400)
+        return JsonResponse(result._asdict())
+    return render(request, 'main_g/import_inv.html', {'form': form, 'result': result, 'file_error': file_error})
+
+
 class CreateSalesView(CreateView, ListView):
     model = SalesRecord
     form_class = SalesRecordForm
@@ -63,7 +164,12 @@ class CreateSalesView(CreateView, ListView):
     context_object_name = "sales"
 
     def get_queryset(self):
-       return SalesRecord.objects.filter(user=self.request.user).order_by('-sale_date')[:5]
+       return SalesRecord.objects.filter(user=self.request.user).select_related('item').order_by('-sale_date')[:5]
+
+    def get_context_data(self, **kwargs):
+        # CreateView's get/post never run ListView.get, so object_list has to be set here.
+        self.object_list = self.get_queryset()
+        return super().get_context_data(**kwargs)
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -73,205 +179,286 @@ class CreateSalesView(CreateView, ListView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        return super().form_valid(form)
+        try:
+            return super().form_valid(form)
+        except InsufficientStock:
+            form.add_error('quantity_sold', "Not enough stock available.")
+            return self.form_invalid(form)
 
 
-class SalesListView(LoginRequiredMixin, ListView):
+class SalesListView(LoginRequiredMixin, JsonListMixin, ListView):
     model = SalesRecord
     template_name = "main_g/sales_list.html"
     context_object_name = "sales"
+    page_size = 25
 
     def get_queryset(self):
-       return SalesRecord.objects.filter(user=self.request.user).order_by('-sale_date')[:25]
+        sales = SalesRecord.objects.filter(user=self.request.user).select_related('item')
+        self.page = KeysetPage(sales, self.request.GET.get('cursor'), self.page_size)
+        return self.page.object_list
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
 
-        today = now().date()
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        start_of_month = today.replace(day=1)
+        if not self.wants_json():
+            context['totals'] = cached_sales_totals(self.request.user, localdate())
+        return context
 
-        qs = SalesRecord.objects.filter(user=self.request.user)
+    def get_json_data(self, context):
+        return {
+            'results': [sale_json(sale) for sale in context['sales']],
+            'next_cursor': context['next_cursor'],
+        }
 
-        context['totals'] = {
-            'today': qs.filter(sale_date__date=today)
-                     .aggregate(total=Sum(F('quantity_sold') * F('item__price')))['total'] or 0,
 
-            'week': qs.filter(sale_date__date__gte=start_of_week)
-                    .aggregate(total=Sum(F('quantity_sold') * F('item__price')))['total'] or 0,
+@login_required
+async def sales_summary(request):
+    """
+    This month's totals and the newest page of sales as JSON, for dashboards.
 
-            'month': qs.filter(sale_date__date__gte=start_of_month)
-                     .aggregate(total=Sum(F('quantity_sold') * F('item__price')))['total'] or 0,
-        }
+    Both queries go through Django's single thread-sensitive executor, so they
+    run one after the other; gathering them would save no time.
+    """
+    user = await request.auser()
+    sales = SalesRecord.objects.filter(user=user).select_related('item')
+    totals = await acached_sales_totals(user, localdate())
+    page = await sync_to_async(KeysetPage)(sales, request.GET.get('cursor'), SalesListView.page_size)
+    return JsonResponse({
+        'totals': {period: str(total) for period, total in totals.items()},
+        'results': [sale_json(sale) for sale in page],
+        'next_cursor': page.next_cursor,
+    })
 
-        return context
 
+def parse_date_param(request, name, default):
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be a YYYY-MM-DD date.")
 
-def export_sales(request, period):
-    today = now().date()
-    format_type = request.GET.get('format', 'excel')  # default is Excel
-    wb = Workbook()
-
-    def add_total_row(ws, start_row):
-        total_row = ws.max_row + 1
-        ws[f"B{total_row}"] = "TOTAL"
-        ws[f"B{total_row}"].font = Font(bold=True)
-
-        total_1 = 0
-        for row in ws.iter_rows(min_row=start_row, max_row=total_row - 1, min_col=5, max_col=5):
-            for cell in row:
-                if isinstance(cell.value, (int, float)):
-                    total_1 += cell.value
-
-        ws[f"F{total_row}"] = total_1
-        ws[f"E{total_row}"].font = Font(bold=True)
-
-    # Excel sheet generation logic (same as before)
-    if period == 'day':
-        ws = wb.active
-        ws.title = today.strftime("%Y-%m-%d")
-        ws.append(["ID No.", "Item", "Quantity Sold", "Price", "Total", "Date"])
-        start_row = 2
-        sales = SalesRecord.objects.filter(user=request.user, sale_date__date=today)
-        for sale in sales:
-            ws.append([
-                sale.sale_id,
-                sale.item.name,
-                sale.quantity_sold,
-                float(sale.item.price),
-                float(sale.total_sale_amount()),
-                sale.sale_date.strftime("%Y-%m-%d %H:%M")
-            ])
-        add_total_row(ws, start_row)
-
-    elif period == 'week':
-        ws = wb.active
-        ws.title = f"Week of {today.strftime('%Y-%m-%d')}"
-        ws.append(["Date", "ID No.", "Item", "Quantity Sold", "Price", "Total"])
-        start_row = 2
-        start_of_week = today - timedelta(days=today.weekday())
-        for i in range(7):
-            day = start_of_week + timedelta(days=i)
-            day_sales = SalesRecord.objects.filter(user=request.user, sale_date__date=day)
-            if not day_sales.exists():
-                continue
-            ws.append([day.strftime("%A, %Y-%m-%d")])
-            day_start_row = ws.max_row + 1
-            for sale in day_sales:
-                ws.append([
-                    "", sale.sale_id, sale.item.name,
-                    sale.quantity_sold, float(sale.item.price),
-                    float(sale.total_sale_amount())
-                ])
-            subtotal_row = ws.max_row + 1
-            ws[f"D{subtotal_row}"] = "Subtotal"
-            ws[f"D{subtotal_row}"].font = Font(bold=True)
-            sub_total = 0
-            for row in ws.iter_rows(min_row=day_start_row, max_row=subtotal_row - 1, min_col=6, max_col=6):
-                for cell in row:
-                    if isinstance(cell.value, (int, float)):
-                        sub_total += cell.value
-
-            ws[f"G{subtotal_row}"] = sub_total
-            ws[f"G{subtotal_row}"].font = Font(bold=True)
-
-        final_row = ws.max_row + 1
-        ws[f"E{final_row}"] = "TOTAL"
-        ws[f"E{final_row}"].font = Font(bold=True)
-        total = 0
-        for row in ws.iter_rows(min_row=2, max_row=final_row - 1, min_col=6, max_col=6):
-            for cell in row:
-                if isinstance(cell.value, (int, float)):
-                    total += cell.value
-
-        ws[f"G{final_row}"] = total
-        ws[f"G{final_row}"].font = Font(bold=True)
-
-    elif period == 'month':
-        start_of_month = today.replace(day=1)
-        first_monday = start_of_month - timedelta(days=start_of_month.weekday())
-        current_week_start = first_monday
-        while current_week_start.month <= today.month:
-            ws = wb.create_sheet(title=f"Week {current_week_start.strftime('%W')}")
-            ws.append(["Date", "ID No.", "Item", "Quantity Sold", "Price", "Total"])
-            for i in range(7):
-                day = current_week_start + timedelta(days=i)
-                if day.month != today.month:
-                    continue
-                day_sales = SalesRecord.objects.filter(user=request.user, sale_date__date=day)
-                if not day_sales.exists():
-                    continue
-                ws.append([day.strftime("%A, %Y-%m-%d")])
-                day_start_row = ws.max_row + 1
-                for sale in day_sales:
-                    ws.append([
-                        "", sale.sale_id, sale.item.name,
-                        sale.quantity_sold, float(sale.item.price),
-                        float(sale.total_sale_amount())
-                    ])
-                subtotal_row = ws.max_row + 1
-                ws[f"D{subtotal_row}"] = "Subtotal"
-                ws[f"D{subtotal_row}"].font = Font(bold=True)
-                sub_total = 0
-                for row in ws.iter_rows(min_row=day_start_row, max_row=subtotal_row - 1, min_col=6, max_col=6):
-                    for cell in row:
-                        if isinstance(cell.value, (int, float)):
-                            sub_total += cell.value
-
-                ws[f"G{subtotal_row}"] = sub_total
-                ws[f"G{subtotal_row}"].font = Font(bold=True)
-
-            final_row = ws.max_row + 1
-            ws[f"E{final_row}"] = "TOTAL"
-            ws[f"E{final_row}"].font = Font(bold=True)
-            total = 0
-            for row in ws.iter_rows(min_row=2, max_row=final_row - 1, min_col=6, max_col=6):
-                for cell in row:
-                    if isinstance(cell.value, (int, float)):
-                        total += cell.value
-
-            ws[f"G{final_row}"] = total
-            ws[f"G{final_row}"].font = Font(bold=True)
-            current_week_start += timedelta(days=7)
-
-    # Decide output format
-    if format_type == 'pdf':
-        response = HttpResponse(content_type='application/pdf')
-        filename = f"sales_{period}_{today}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        c = canvas.Canvas(response, pagesize=A4)
-        width, height = A4
-        y = height - 2 * cm
-        for sheet in wb.worksheets:
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(2 * cm, y, f"Sales Report: {sheet.title}")
-            y -= 1.5 * cm
-            c.setFont("Helvetica", 10)
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
-                c.drawString(2 * cm, y, row_text)
-                y -= 0.7 * cm
-                if y < 2 * cm:
-                    c.showPage()
-                    y = height - 2 * cm
-            c.showPage()
-        c.save()
-        return response
 
-    else:
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+def series_json(series, precision=2):
+    return [{'period': stamp.date().isoformat(), 'value': round(value, precision)} for stamp, value in series.items()]
+
+
+class SalesAnalyticsView(LoginRequiredMixin, JsonListMixin, TemplateView):
+    """Revenue trends, best sellers and sell-through for ``?start=`` to ``?end=`` (inclusive)."""
+    template_name = "main_g/analytics.html"
+    default_days = 90
+    max_days = ExportRangeForm.MAX_DAYS
+    # pandas timestamps stop in April 2262; the last month's label has to fit too.
+    first_date, last_date = ExportRangeForm.FIRST_DATE, date(2262, 3, 31)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = localdate()
+        end = parse_date_param(self.request, 'end', today)
+        if not self.first_date <= end <= self.last_date:
+            raise BadRequest(f"end must fall between {self.first_date} and {self.last_date}.")
+        start = parse_date_param(self.request, 'start', end - timedelta(days=self.default_days - 1))
+        if not self.first_date <= start <= end:
+            raise BadRequest(f"start must not be after end or before {self.first_date}.")
+        if (end - start).days >= self.max_days:
+            raise BadRequest(f"Analytics are limited to {self.max_days} days.")
+        end += ONE_DAY
+
+        from .analytics import SalesAnalytics  # pandas and numpy load on the first analytics request
+
+        analytics = SalesAnalytics(self.request.user, start, end)
+        context.update(
+            start=start,
+            end=end - ONE_DAY,
+            daily=series_json(analytics.daily_revenue()),
+            moving_average=series_json(analytics.moving_average()),
+            weekly=series_json(analytics.revenue('week')),
+            monthly=series_json(analytics.revenue('month')),
+            top_items=analytics.top_items().to_dict('records'),
+            sell_through=analytics.sell_through().to_dict('records'),
         )
-        filename = f"sales_{period}_{today}.xlsx"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        wb.save(response)
-        return response
+        for day, average in zip(context['daily'], context['moving_average']):
+            day['average'] = average['value']
+        return context
+
+    def get_json_data(self, context):
+        keys = ['daily', 'weekly', 'monthly', 'top_items', 'sell_through']
+        data = {key: context[key] for key in keys}
+        data.update(start=context['start'].isoformat(), end=context['end'].isoformat())
+        return data
 
 
+@login_required
+@require_POST
+def batch_sales(request):
+    """Record a JSON or CSV batch of sales (e.g. from an offline till) in one transaction."""
+    try:
+        rows = parse_sales(request.body.decode('utf-8'), request.content_type)
+        sales = record_sales(request.user, rows)
+    except UnicodeDecodeError:
+        return JsonResponse({'errors': [{'row': None, 'error': "Body must be UTF-8."}]}, status=400)
+    except BatchError as e:
+        return JsonResponse({'errors': e.errors}, status=400)
+    return JsonResponse({'created': len(sales), 'sale_ids': [sale.sale_id for sale in sales]}, status=201)
 
 
+@staff_member_required
+def cache_stats(request):
+    """Dashboard totals and export cache hit/miss counters for this worker process."""
+    return JsonResponse(dict(caching.stats))
 
 
+@staff_member_required
+def request_stats(request):
+    """Per-URL-name request totals collected by the instrumentation middleware in this worker process."""
+    return JsonResponse({name: dict(totals) for name, totals in middleware.stats.items()})
 
 
+@login_required
+async def export_sales(request, period):
+    today = now().date()
+    format_type = request.GET.get('format', 'excel')  # default is Excel
+    try:
+        start, end = period_bounds(period, today)
+    except ValueError:
+        raise Http404("Unknown export period.")
+
+    user = await request.auser()
+    if format_type in STREAM_FORMATS:
+        stream_format = STREAM_FORMATS[format_type]
+        return stream_response(
+            request, stream_format, user, start, end, export_filename(stream_format, period, today),
+        )
+
+    export_format = get_format(format_type)
+    return await sync_to_async(export_response)(
+        request, user, f"{period}:{today}", known_format(format_type), start, end,
+        export_filename(export_format, period, today),
+        lambda out, report: export_format.write(out, report, period, today),
+    )
+
+
+@login_required
+async def export_sales_range(request):
+    """
+    Export ``?start=YYYY-MM-DD&end=YYYY-MM-DD`` (inclusive) in sections of
+    ``?granularity=day|week|month``, as ``?format=excel|pdf``, or as one line
+    per sale with ``?format=csv|ndjson`` (add ``&gzip=1`` to compress).
+
+    Invalid parameters are rejected with a 400 before anything is queried.
+    """
+    form = ExportRangeForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    start, granularity = form.cleaned_data['start'], form.cleaned_data['granularity']
+    end = form.cleaned_data['end'] + ONE_DAY
+    user = await request.auser()
+    if form.cleaned_data['format'] in STREAM_FORMATS:
+        stream_format = STREAM_FORMATS[form.cleaned_data['format']]
+        return stream_response(
+            request, stream_format, user, start, end, range_filename(stream_format, start, end - ONE_DAY, 'sale'),
+        )
 
+    export_format = get_format(form.cleaned_data['format'])
+    return await sync_to_async(export_response)(
+        request, user, f"range:{granularity}", form.cleaned_data['format'], start, end,
+        range_filename(export_format, start, end - ONE_DAY, granularity),
+        lambda out, report: export_format.write_range(out, report, granularity),
+    )
+
+
+def stream_response(request, stream_format, user, start, end, filename):
+    """
+    Stream ``user``'s sales in ``[start, end)`` as a ``stream_format`` attachment,
+    gzipped when ``?gzip=1``.
+
+    Under ASGI the rows come from an async iterator, so a long download does
+    not tie up a worker thread; WSGI servers can only consume sync iterators.
+    """
+    compress = request.GET.get('gzip', '').lower() in ('1', 'true', 'yes')
+    if isinstance(request, ASGIRequest):
+        content = astream_rows(stream_format, asales_rows(user, start, end), compress)
+    else:
+        content = stream_rows(stream_format, sales_rows(user, start, end), compress)
+    response = StreamingHttpResponse(
+        content, content_type='application/gzip' if compress else f"{stream_format.content_type}; charset=utf-8",
+    )
+    filename += '.gz' if compress else ''
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_response(request, user, layout, format_name, start, end, filename, write):
+    """
+    Serve ``user``'s ``layout`` export of ``[start, end)``, rendering it with
+    ``write(fileobj, report)`` only when it is neither fresh in the client (304)
+    nor in the cache.
+
+    Under ASGI the file is read through an async iterator; a plain
+    ``FileResponse`` would make Django buffer all of it before sending.
+    """
+    export_format = get_format(format_name)
+    version = caching.export_version(user, layout, format_name, start, end)
+    last_modified = version.last_modified and version.last_modified.timestamp()
+    response = get_conditional_response(request, etag=f'"{version.etag}"', last_modified=last_modified)
+    if response is None:
+        report = SalesReport(user, start, end)
+        response = FileResponse(
+            caching.cached_export(version.key, lambda out: write(out, report)), as_attachment=True,
+            filename=filename, content_type=export_format.content_type,
+        )
+        if isinstance(request, ASGIRequest):
+            # The headers (length, disposition) are already set; the file is still closed with the response.
+            response.streaming_content = aread_file(response.file_to_stream, response.block_size)
+    response['ETag'] = f'"{version.etag}"'
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def job_json(job):
+    data = {
+        'id': job.pk,
+        'status': job.status,
+        'status_url': reverse('export_job', args=[job.pk]),
+        'download_url': None,
+    }
+    if job.status == ExportJob.DONE:
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+    elif job.status == ExportJob.FAILED:
+        data['error'] = job.error
+    return data
+
+
+@login_required
+@require_POST
+def export_sales_async(request, period):
+    """
+    Queue ``export_sales`` for the background worker and return the job to poll.
+
+    Only the rendered formats can be queued; csv and ndjson are streamed by
+    ``export_sales`` directly, so they (and unknown formats) get a 400.
+    """
+    format_name = request.GET.get('format', DEFAULT_FORMAT)
+    if format_name not in FORMATS:
+        return JsonResponse({'errors': {'format': [f"Background exports support {', '.join(FORMATS)}."]}}, status=400)
+    try:
+        job = request_export(request.user, period, localdate(), format_name)
+    except ValueError:
+        raise Http404("Unknown export period.")
+    return JsonResponse(job_json(job), status=202)
+
+
+@login_required
+def export_job(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    return JsonResponse(job_json(job))
+
+
+@login_required
+def export_job_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user, status=ExportJob.DONE)
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
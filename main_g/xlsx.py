@@ -0,0 +1,159 @@
+from datetime import timedelta
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter, quote_sheetname
+
+from .reports import report_sections
+
+
+MONEY_FORMAT = '#,##0.00'
+THIN = Side(style='thin')
+
+# (header, column width) for each sheet layout.
+DAY_COLUMNS = [("ID No.", 14), ("Item", 28), ("Quantity Sold", 14), ("Price", 10), ("Total", 12), ("Date", 17)]
+GROUPED_COLUMNS = [
+    ("Date", 24), ("ID No.", 14), ("Item", 28), ("Quantity Sold", 14), ("Price", 10), ("Total", 12),
+]
+SUMMARY_COLUMNS = [("Sheet", 24), ("From", 12), ("To", 12), ("Sales", 8), ("Quantity", 10), ("Total", 12)]
+
+
+def _named_styles():
+    # Built per workbook: a NamedStyle is bound to the workbook it is added to.
+    return [
+        NamedStyle('header', font=Font(bold=True), fill=PatternFill('solid', fgColor='DDDDDD'),
+                   border=Border(bottom=THIN)),
+        NamedStyle('subtotal', font=Font(bold=True), number_format=MONEY_FORMAT),
+        NamedStyle('total', font=Font(bold=True), number_format=MONEY_FORMAT, border=Border(top=THIN)),
+    ]
+
+
+class Sheet:
+    """A write-only worksheet that keeps count of its rows, so formulas can refer back to them."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.row = 0
+
+    def append(self, values, style=None, columns=()):
+        """Append ``values``, giving the cells in ``columns`` (1-based) the named ``style``; returns the row."""
+        cells = []
+        for column, value in enumerate(values, 1):
+            if style and column in columns:
+                value = WriteOnlyCell(self.ws, value)
+                value.style = style
+            cells.append(value)
+        self.ws.append(cells)
+        self.row += 1
+        return self.row
+
+
+class ReportWorkbook:
+    """
+    Write-only workbook for sales reports.
+
+    Rows go straight to a temporary file as they are appended, so memory does
+    not grow with the number of sales. Header, subtotal and total cells share
+    named styles registered once per workbook, and every sum is an Excel
+    formula so the figures recompute if a row is edited.
+    """
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        for style in _named_styles():
+            self.workbook.add_named_style(style)
+
+    def sheet(self, title, columns):
+        """A new sheet with a styled, frozen header row and fixed column widths."""
+        ws = self.workbook.create_sheet(title=title)
+        ws.freeze_panes = 'A2'
+        for column, (_, width) in enumerate(columns, 1):
+            ws.column_dimensions[get_column_letter(column)].width = width
+        sheet = Sheet(ws)
+        sheet.append([header for header, _ in columns], 'header', range(1, len(columns) + 1))
+        return sheet
+
+    def day_sheet(self, title, report):
+        """Every sale in ``report`` on one sheet, with a TOTAL formula under the Total column."""
+        sheet = self.sheet(title, DAY_COLUMNS)
+        for row in report.rows():
+            sheet.append([
+                row.sale_id, row.item, row.quantity, float(row.price), float(row.total),
+                row.sold_at.strftime("%Y-%m-%d %H:%M"),
+            ])
+        total = f"=SUM(E2:E{sheet.row})" if sheet.row > 1 else 0
+        sheet.append(["", "TOTAL", "", "", total, ""], 'total', (2, 5))
+
+    def grouped_sheet(self, title, group):
+        """
+        Write ``group`` day by day with a SUM subtotal after each day and a
+        grand total adding up the subtotals. Returns the sheet and the row
+        holding the grand total.
+        """
+        sheet = self.sheet(title, GROUPED_COLUMNS)
+        for day in group.days():
+            sheet.append([day.start.strftime("%A, %Y-%m-%d")])
+            first = sheet.row + 1
+            for row in day.rows():
+                sheet.append(["", row.sale_id, row.item, row.quantity, float(row.price), float(row.total)])
+            sheet.append(["", "", "", "Subtotal", "", f"=SUM(F{first}:F{sheet.row})"], 'subtotal', (4, 6))
+        last = sheet.row
+        total = f'=SUMIF(D2:D{last},"Subtotal",F2:F{last})' if last > 1 else 0
+        return sheet, sheet.append(["", "", "", "", "TOTAL", total], 'total', (5, 6))
+
+    def sectioned(self, sections):
+        """
+        One grouped sheet per ``(title, group)`` section, preceded by a summary
+        sheet whose totals are formulas pointing at each section's grand total.
+        """
+        summary = self.sheet("Summary", SUMMARY_COLUMNS)
+        for title, group in sections:
+            _, total_row = self.grouped_sheet(title, group)
+            summary.append([
+                title, group.start.isoformat(), (group.end - timedelta(days=1)).isoformat(),
+                group.count, group.quantity, f"={quote_sheetname(title)}!F{total_row}",
+            ])
+        total = f"=SUM(F2:F{summary.row})" if summary.row > 1 else 0
+        summary.append(["TOTAL", "", "", "", "", total], 'total', (1, 6))
+
+    def save(self, out):
+        self.workbook.save(out)
+
+
+def _weeks(report):
+    for week in report.weeks():
+        # Title by the Monday so a week that starts in the previous month keeps its number.
+        monday = week.start - timedelta(days=week.start.weekday())
+        yield f"Week {monday.strftime('%W')}", week
+
+
+def build_workbook(report, period, today):
+    """Lay ``report`` out the way the export for ``period`` expects."""
+    book = ReportWorkbook()
+    if period == 'day':
+        book.day_sheet(today.strftime("%Y-%m-%d"), report)
+    elif period == 'week':
+        book.grouped_sheet(f"Week of {today.strftime('%Y-%m-%d')}", report)
+    elif period == 'month':
+        book.sectioned(_weeks(report))
+    return book
+
+
+def write_workbook(out, report, period, today):
+    """Write the XLSX export for ``report`` to the binary file ``out``."""
+    build_workbook(report, period, today).save(out)
+
+
+def write_range_workbook(out, report, granularity):
+    """
+    Write a date-range export of ``report`` with a sheet per ``granularity``
+    section to ``out``, led by a summary sheet for week and month sections.
+    """
+    book = ReportWorkbook()
+    if granularity == 'day':
+        for title, group in report_sections(report, granularity):
+            book.grouped_sheet(title, group)
+    else:
+        book.sectioned(report_sections(report, granularity))
+    book.save(out)
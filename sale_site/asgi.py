@@ -3,6 +3,12 @@ ASGI config for sale_site project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with any ASGI server, e.g. ``uvicorn sale_site.asgi:application``.
+Under ASGI the sales summary and the CSV/NDJSON exports run as async views
+and stream rows from async iterators. WhiteNoise is sync-only, so Django runs
+it (and the middleware inside it) in a thread; put static files behind the
+web server or a CDN to keep the whole chain async.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """